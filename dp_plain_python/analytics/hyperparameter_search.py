@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import math
+from typing import Any
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import train_test_split
+import sklearn.metrics as metrics
+from dp_plain_python.analytics.model import build_model
+from dp_plain_python.environment import config, file_storage
+
+log = logging.getLogger(__name__)
+
+search_cache_filename = "search_cache.json"
+
+# Each trial draws one value per parameter
+param_space: dict[str, list[Any]] = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [None, 10, 20, 30],
+    "min_samples_leaf": [1, 2, 4, 8],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+
+# Successive halving keeps the best 1/eta of the trials per rung
+# and gives the survivors eta times more training rows
+eta = 3
+
+
+def search(X: np.ndarray, y: np.ndarray) -> dict[str, Any]:
+    # X and y are the training part only, the trials are validated on a part of it,
+    # so that the rows the final model is tested on play no part in choosing it
+    mode = config.get_analytics_setting("SearchMode")
+    trials = int(config.get_analytics_setting("SearchTrials"))
+    n_jobs = int(config.get_analytics_setting("SearchJobs"))
+
+    log.info(f"Starting hyperparameter search (mode: {mode}, trials: {trials})")
+
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, random_state=1337, test_size=0.25
+    )
+
+    candidates = _sample_candidates(trials)
+    budgets = _get_budgets(mode, len(candidates), len(X_train))
+
+    storage = file_storage.get_storage()
+    cache_path = config.get_location("Analytics") / search_cache_filename
+    cache = storage.read_json(cache_path) if storage.exists(cache_path) else {}
+    feature_hash = _hash_feature_matrix(X, y)
+
+    for rung, budget in enumerate(budgets):
+        keys = [_trial_key(feature_hash, params, budget) for params in candidates]
+        pending = [
+            (key, params) for key, params in zip(keys, candidates) if key not in cache
+        ]
+
+        log.info(
+            f"Rung {rung}: {len(candidates)} trials on {budget} rows "
+            f"({len(candidates) - len(pending)} cached)"
+        )
+
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_run_trial)(X_train, y_train, X_val, y_val, params, budget)
+            for _, params in pending
+        )
+        cache.update({key: score for (key, _), score in zip(pending, scores)})
+        storage.write_json(cache, cache_path)
+
+        ranked = sorted(
+            zip(candidates, keys),
+            key=lambda candidate: cache[candidate[1]],
+            reverse=True,
+        )
+
+        if rung < len(budgets) - 1:
+            # Stop the unpromising trials, only the best ones get a larger budget
+            survivors = max(1, math.ceil(len(ranked) / eta))
+            candidates = [params for params, _ in ranked[:survivors]]
+
+    best_params, best_key = ranked[0]
+    log.info(f"Best parameters: {best_params} (R^2: {cache[best_key]})")
+
+    return best_params
+
+
+def _sample_candidates(trials: int) -> list[dict[str, Any]]:
+    # Distinct combinations, numbered across the whole space. A trial count larger
+    # than the space tries every combination once.
+    rng = np.random.default_rng(1337)
+    sizes = [len(values) for values in param_space.values()]
+    combinations = rng.choice(
+        math.prod(sizes), min(trials, math.prod(sizes)), replace=False
+    )
+
+    candidates = []
+    for combination in combinations:
+        positions = np.unravel_index(combination, sizes)
+        candidates.append(
+            {
+                name: values[position]
+                for (name, values), position in zip(param_space.items(), positions)
+            }
+        )
+
+    return candidates
+
+
+def _get_budgets(mode: str, trials: int, rows: int) -> list[int]:
+    if mode == "Random":
+        return [rows]
+    if mode == "SuccessiveHalving":
+        # Enough rungs that at most eta trials reach the full budget
+        rungs = 1
+        while eta**rungs < trials:
+            rungs += 1
+
+        return [max(1, rows // eta ** (rungs - 1 - rung)) for rung in range(rungs)]
+    else:
+        raise ValueError(
+            f"{mode} is not a supported search mode. Use 'None', 'Random' or 'SuccessiveHalving'."
+        )
+
+
+def _run_trial(X_train, y_train, X_val, y_val, params: dict[str, Any], budget: int):
+    # The training split is already shuffled, so the first rows are a random sample
+    model = build_model(params)
+    model.fit(X_train[:budget], y_train[:budget])
+
+    return float(metrics.r2_score(y_val, model.predict(X_val)))
+
+
+def _hash_feature_matrix(X: np.ndarray, y: np.ndarray) -> str:
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).data)
+    digest.update(np.ascontiguousarray(y).data)
+
+    return digest.hexdigest()
+
+
+def _trial_key(feature_hash: str, params: dict[str, Any], budget: int) -> str:
+    trial = json.dumps({"params": params, "budget": budget}, sort_keys=True)
+
+    return hashlib.sha256(f"{feature_hash}:{trial}".encode("utf-8")).hexdigest()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from dp_plain_python.environment import config, file_storage
+from dp_plain_python.environment.file_storage import LocalFileStorage
+from . import hyperparameter_search
+
+settings = {"SearchMode": "SuccessiveHalving", "SearchTrials": "9", "SearchJobs": "1"}
+
+
+@pytest.fixture
+def trials(tmp_path, monkeypatch):
+    storage = LocalFileStorage()
+    monkeypatch.setattr(file_storage, "get_storage", lambda: storage)
+    monkeypatch.setattr(config, "get_location", lambda _: tmp_path)
+    monkeypatch.setattr(config, "get_analytics_setting", settings.get)
+
+    # Scores every trial by its number of trees, without fitting anything
+    trials = []
+
+    def run_trial(X_train, y_train, X_val, y_val, params, budget):
+        trials.append((params, budget))
+        return float(params["n_estimators"])
+
+    monkeypatch.setattr(hyperparameter_search, "_run_trial", run_trial)
+    return trials
+
+
+def test_successive_halving_budgets_grow_by_eta():
+    assert hyperparameter_search._get_budgets("SuccessiveHalving", 27, 900) == [
+        100,
+        300,
+        900,
+    ]
+    assert hyperparameter_search._get_budgets("Random", 27, 900) == [900]
+
+
+def test_search_keeps_the_best_trials_and_reuses_cached_ones(trials):
+    rng = np.random.default_rng(0)
+    X, y = rng.uniform(size=(400, 3)), rng.uniform(size=400)
+
+    best = hyperparameter_search.search(X, y)
+
+    # 9 distinct trials, the best 3 of them get 3 times more rows
+    assert [budget for _, budget in trials].count(100) == 9
+    assert [budget for _, budget in trials].count(300) == 3
+    first_rung = [params for params, budget in trials if budget == 100]
+    assert len({str(sorted(params.items())) for params in first_rung}) == 9
+    assert best["n_estimators"] == max(p["n_estimators"] for p in first_rung)
+
+    trials.clear()
+    assert hyperparameter_search.search(X, y) == best
+    assert trials == []
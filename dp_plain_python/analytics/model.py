@@ -0,0 +1,68 @@
+import logging
+from typing import Any, Optional
+import pandas as pd
+from pathlib import Path
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
+from dp_plain_python.environment import artifacts, config, file_storage
+from dp_plain_python.utils.feature_matrix import FeatureMatrix, to_feature_matrix
+
+log = logging.getLogger(__name__)
+
+feature_set_filename = "feature_set.csv"
+model_params_filename = "model_params.json"
+model_filename = "model"
+
+
+def build_model(params: Optional[dict[str, Any]] = None) -> Pipeline:
+    return Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            ("linreg", RandomForestRegressor(**(params or {}))),
+        ]
+    )
+
+
+def load_feature_matrix() -> FeatureMatrix:
+    feature_matrix = artifacts.get("feature_matrix")
+    if feature_matrix is not None:
+        log.info("Using feature matrix handed over from transformed_analytics")
+        return feature_matrix
+
+    if config.get_analytics_setting("PersistFeatureMatrix") == "True":
+        log.info("Loading feature matrix from transformed_analytics for analytics")
+        storage = file_storage.get_storage()
+        transformed_analytics_path = config.get_location("TransformedAnalytics")
+        return FeatureMatrix(
+            storage.read_array(
+                transformed_analytics_path / "feature_matrix_X.npy", mmap=True
+            ),
+            storage.read_array(
+                transformed_analytics_path / "feature_matrix_y.npy", mmap=True
+            ),
+        )
+
+    return to_feature_matrix(_read_feature_set())
+
+
+def load_model_params() -> dict[str, Any]:
+    params = artifacts.get("model_params")
+    if params is not None:
+        log.info("Using model parameters handed over from analytics")
+        return params
+
+    storage = file_storage.get_storage()
+    path = config.get_location("Analytics") / model_params_filename
+    if storage.exists(path):
+        log.info(f"Loading {model_params_filename} from analytics")
+        return storage.read_json(path)
+
+    return {}
+
+
+def _read_feature_set() -> pd.DataFrame:
+    log.info(f"Loading {feature_set_filename} from transformed_analytics for analytics")
+    path = Path(config.get_location("TransformedAnalytics")) / feature_set_filename
+
+    return file_storage.get_storage().read_dataframe(path)
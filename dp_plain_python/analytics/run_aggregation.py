@@ -0,0 +1,156 @@
+import logging
+from pathlib import Path
+from typing import Optional
+import numpy as np
+import pandas as pd
+from dp_plain_python.environment import config, file_storage, run_report
+from dp_plain_python.environment.file_storage import Columns
+from dp_plain_python.transform.clean_resale_prices import (
+    get_cleaned_resale_prices,
+    normalize_months,
+    resale_flat_prices_columns,
+)
+from dp_plain_python.utils.price_cube import (
+    CUBE_DIMENSIONS,
+    PriceCube,
+    build_price_cube,
+)
+
+log = logging.getLogger(__name__)
+
+price_cube_filename = "price_cube.csv"
+manifest_filename = "manifest.json"
+
+price_cube_columns: Columns = {
+    "month": "string",
+    "town": "category",
+    "room_no": "int64",
+    "flat_model": "category",
+    "bin": "int64",
+    "count": "int64",
+    "price_sum": "float64",
+}
+
+# The cubes last read for queries by location, with the fingerprint of the
+# manifest they belong to
+_loaded_price_cubes: dict[str, tuple[str, PriceCube]] = {}
+
+
+def run_aggregation() -> None:
+    log.info("Starting Aggregation Step")
+
+    storage = file_storage.get_storage()
+    aggregates_path = _get_aggregates_path()
+    storage.ensure_directory(aggregates_path)
+
+    df_resale_flat_prices = storage.read_dataframe(
+        config.get_location("Storage")
+        / config.get_storage_filename("ResaleFlatPrices"),
+        resale_flat_prices_columns,
+        config.get_csv_engine("ResaleFlatPrices"),
+    )
+    months = normalize_months(df_resale_flat_prices["month"])
+    fingerprints = _fingerprint_months(df_resale_flat_prices, months)
+
+    # Only months whose rows changed since the last refresh are aggregated again,
+    # a different bin width changes every cell
+    bin_width = float(config.get_aggregation_setting("PriceBinWidth"))
+    manifest = _read_manifest()
+    previous = (
+        manifest["months"]
+        if manifest is not None and manifest["bin_width"] == bin_width
+        else {}
+    )
+    touched = sorted(
+        month
+        for month, fingerprint in fingerprints.items()
+        if previous.get(month) != fingerprint
+    )
+    removed = sorted(set(previous) - set(fingerprints))
+
+    log.info(
+        f"Aggregating {len(touched)} of {len(fingerprints)} months, removing {len(removed)}"
+    )
+    if touched or removed:
+        df_cube = build_price_cube(
+            get_cleaned_resale_prices(
+                df_resale_flat_prices[months.isin(touched).to_numpy()].copy()
+            ),
+            bin_width,
+        )
+        if previous:
+            df_previous = storage.read_dataframe(
+                aggregates_path / price_cube_filename, price_cube_columns
+            )
+            df_previous = df_previous[~df_previous["month"].isin(touched + removed)]
+            df_cube = pd.concat([df_previous, df_cube], ignore_index=True)
+
+        df_cube = df_cube.sort_values([*CUBE_DIMENSIONS, "bin"], ignore_index=True)
+
+        # The manifest goes last, a refresh that didn't complete is repeated
+        storage.write_dataframe(df_cube, aggregates_path / price_cube_filename)
+        storage.write_json(
+            {"bin_width": bin_width, "months": fingerprints},
+            aggregates_path / manifest_filename,
+        )
+
+    run_report.add_section(
+        "aggregation",
+        {"months": len(fingerprints), "touched": touched, "removed": removed},
+    )
+
+
+def read_price_cube() -> Optional[PriceCube]:
+    # Kept in memory for queries until a refresh writes a new manifest
+    storage = file_storage.get_storage()
+    aggregates_path = _get_aggregates_path()
+
+    fingerprint = storage.fingerprint(aggregates_path / manifest_filename)
+    if fingerprint is None:
+        return None
+
+    loaded = _loaded_price_cubes.get(str(aggregates_path))
+    if loaded is None or loaded[0] != fingerprint:
+        manifest = storage.read_json(aggregates_path / manifest_filename)
+        df_cells = storage.read_dataframe(
+            aggregates_path / price_cube_filename, price_cube_columns
+        )
+        loaded = (fingerprint, PriceCube(df_cells, manifest["bin_width"]))
+        _loaded_price_cubes[str(aggregates_path)] = loaded
+
+    return loaded[1]
+
+
+def _get_aggregates_path() -> Path:
+    return config.get_location("Analytics") / "aggregates"
+
+
+def _read_manifest() -> Optional[dict]:
+    # Without the cube, the manifest doesn't describe anything
+    storage = file_storage.get_storage()
+    aggregates_path = _get_aggregates_path()
+    if not storage.exists(aggregates_path / manifest_filename) or not storage.exists(
+        aggregates_path / price_cube_filename
+    ):
+        return None
+
+    return storage.read_json(aggregates_path / manifest_filename)
+
+
+def _fingerprint_months(
+    df_resale_flat_prices: pd.DataFrame, months: pd.Series
+) -> dict[str, str]:
+    # Sums the hashes of the rows of every month, so the fingerprint of a month
+    # only changes with its rows, whatever their order in the file
+    codes, unique_months = pd.factorize(months)
+    hashes = pd.util.hash_pandas_object(df_resale_flat_prices, index=False).to_numpy()
+
+    known = codes >= 0
+    sums = np.zeros(len(unique_months), dtype=np.uint64)
+    np.add.at(sums, codes[known], hashes[known])
+    counts = np.bincount(codes[known], minlength=len(unique_months))
+
+    return {
+        month: f"{count}-{hash_sum:016x}"
+        for month, count, hash_sum in zip(unique_months, counts, sums)
+    }
@@ -0,0 +1,146 @@
+import logging
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import KFold
+from dp_plain_python.analytics.model import (
+    build_model,
+    load_feature_matrix,
+    load_model_params,
+)
+from dp_plain_python.environment import config, file_storage, run_report
+
+log = logging.getLogger(__name__)
+
+metrics_filename = "metrics.csv"
+
+
+def run_evaluation() -> None:
+    log.info("Starting Evaluation Step")
+
+    storage = file_storage.get_storage()
+    analytics_path = config.get_location("Analytics")
+    storage.ensure_directory(analytics_path)
+
+    X, y = load_feature_matrix()
+
+    df_metrics = _cross_validate(
+        X,
+        y,
+        folds=int(config.get_analytics_setting("CrossValidationFolds")),
+        n_jobs=int(config.get_analytics_setting("CrossValidationJobs")),
+    )
+    _print_metrics(df_metrics)
+
+    storage.write_dataframe(df_metrics, analytics_path / metrics_filename)
+    run_report.add_section("evaluation", df_metrics.to_dict(orient="records"))
+
+
+def _cross_validate(
+    X: np.ndarray, y: np.ndarray, folds: int, n_jobs: int
+) -> pd.DataFrame:
+    log.info(f"Running {folds}-fold cross-validation (n_jobs: {n_jobs})")
+
+    # Evaluate the tuned configuration if a search ran before
+    params = load_model_params()
+
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=1337).split(X))
+
+    # Every fold fits its own model, the folds are spread across cores
+    predictions = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_predict)(X, y, train_index, test_index, params)
+        for train_index, test_index in splits
+    )
+
+    train_fold = np.concatenate(
+        [np.full(len(train), fold) for fold, (train, _) in enumerate(splits)]
+    )
+    test_fold = np.concatenate(
+        [np.full(len(test), fold) for fold, (_, test) in enumerate(splits)]
+    )
+    y_train = np.concatenate([y[train] for train, _ in splits])
+    y_test = np.concatenate([y[test] for _, test in splits])
+    y_train_pred = np.concatenate([train_pred for train_pred, _ in predictions])  # type: ignore
+    y_test_pred = np.concatenate([test_pred for _, test_pred in predictions])  # type: ignore
+
+    return _calculate_metrics(
+        y_train, y_train_pred, train_fold, y_test, y_test_pred, test_fold, folds
+    )
+
+
+def _fit_and_predict(
+    X, y, train_index, test_index, params
+) -> tuple[np.ndarray, np.ndarray]:
+    model = build_model(params)
+    model.fit(X[train_index], y[train_index])
+
+    return model.predict(X[train_index]), model.predict(X[test_index])
+
+
+def _calculate_metrics(
+    y_train,
+    y_train_pred,
+    train_fold,
+    y_test,
+    y_test_pred,
+    test_fold,
+    folds: int,
+) -> pd.DataFrame:
+    # All folds are evaluated at once, the per-fold sums are taken with bincount
+    train = _fold_sums(y_train, y_train_pred, train_fold, folds)
+    test = _fold_sums(y_test, y_test_pred, test_fold, folds)
+
+    mse = test["squared_error"] / test["count"]
+    mape = test["percentage_error"] / test["count"]
+
+    df_metrics = pd.DataFrame()
+
+    df_metrics["fold"] = np.arange(folds)
+    df_metrics["r2_train"] = 1 - train["squared_error"] / train["total_variance"]
+    df_metrics["r2_test"] = 1 - test["squared_error"] / test["total_variance"]
+    df_metrics["MAE"] = test["absolute_error"] / test["count"]
+    df_metrics["MSE"] = mse
+    df_metrics["RMSE"] = np.sqrt(mse)
+    df_metrics["MAPE"] = np.round(mape * 100, 2)
+    df_metrics["Accuracy"] = np.round(100 * (1 - mape), 2)
+
+    df_mean = df_metrics.drop(columns="fold").mean().to_frame().T
+    df_mean.insert(0, "fold", "mean")
+
+    return pd.concat([df_metrics, df_mean], ignore_index=True)
+
+
+def _fold_sums(y_true, y_pred, fold, folds: int) -> dict[str, np.ndarray]:
+    def fold_sum(values):
+        return np.bincount(fold, weights=values, minlength=folds)
+
+    count = np.bincount(fold, minlength=folds)
+    error = y_true - y_pred
+    absolute_error = np.abs(error)
+    fold_mean = fold_sum(y_true) / count
+
+    return {
+        "count": count,
+        "squared_error": fold_sum(error * error),
+        "absolute_error": fold_sum(absolute_error),
+        "percentage_error": fold_sum(absolute_error / np.abs(y_true)),
+        "total_variance": fold_sum((y_true - fold_mean[fold]) ** 2),
+    }
+
+
+def _print_metrics(df_metrics: pd.DataFrame):
+    mean = df_metrics.iloc[-1]
+
+    formatted_metrics = f"""Result Metrics (mean over {len(df_metrics) - 1} folds):
+R^2 Score on Training: {mean["r2_train"]}
+R^2 Score on Test: {mean["r2_test"]}
+
+Mean Absolute Error (MAE): {mean["MAE"]}
+Mean Squared Error (MSE): {mean["MSE"]}
+Root Mean Squared Error (RMSE): {mean["RMSE"]}
+
+Mean Absolute Percentage Error (MAPE): {mean["MAPE"]}
+Accuracy: {mean["Accuracy"]}
+    """
+
+    log.info(formatted_metrics)
@@ -0,0 +1,29 @@
+import numpy as np
+import sklearn.metrics as metrics
+
+from .run_evaluation import _calculate_metrics
+
+
+def test_calculate_metrics_matches_sklearn_per_fold():
+    rng = np.random.default_rng(42)
+    folds = 3
+    fold = np.repeat(np.arange(folds), [4, 5, 6])
+    y = rng.uniform(200_000, 900_000, len(fold))
+    y_pred = y + rng.normal(0, 50_000, len(fold))
+
+    df_metrics = _calculate_metrics(y, y_pred, fold, y, y_pred, fold, folds)
+
+    for i in range(folds):
+        mask = fold == i
+        row = df_metrics.iloc[i]
+        mape = metrics.mean_absolute_percentage_error(y[mask], y_pred[mask])
+
+        assert np.isclose(row["r2_test"], metrics.r2_score(y[mask], y_pred[mask]))
+        assert np.isclose(
+            row["MAE"], metrics.mean_absolute_error(y[mask], y_pred[mask])
+        )
+        assert np.isclose(row["MSE"], metrics.mean_squared_error(y[mask], y_pred[mask]))
+        assert row["MAPE"] == round(mape * 100, 2)
+
+    assert df_metrics.iloc[-1]["fold"] == "mean"
+    assert np.isclose(df_metrics.iloc[-1]["MAE"], df_metrics["MAE"][:folds].mean())
@@ -0,0 +1,213 @@
+import collections
+import contextlib
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, Optional
+import numpy as np
+import pandas as pd
+from joblib import effective_n_jobs
+from dp_plain_python.analytics.model import feature_set_filename, model_filename
+from dp_plain_python.environment import config, file_storage, run_report
+from dp_plain_python.environment.file_storage import Columns
+from dp_plain_python.transform.clean_resale_prices import (
+    get_cleaned_resale_prices,
+    normalize_months,
+    resale_flat_prices_columns,
+)
+from dp_plain_python.transform.run_analytics_transform import (
+    ReferenceData,
+    build_feature_set,
+    read_market_history,
+    read_reference_data,
+)
+from dp_plain_python.utils.feature_matrix import (
+    TARGET_COLUMN,
+    get_feature_columns,
+    to_feature_matrix,
+)
+from dp_plain_python.utils.market_features import (
+    MARKET_FEATURE_COLUMNS,
+    add_market_features,
+)
+
+log = logging.getLogger(__name__)
+
+manifest_filename = "manifest.json"
+
+# The columns identifying a flat in the predictions
+prediction_columns = ["town", "block", "street_name", "room_no", "flat_model"]
+
+
+def run_scoring() -> None:
+    log.info("Starting Scoring Step")
+
+    storage = file_storage.get_storage()
+    analytics_path = config.get_location("Analytics")
+
+    model = storage.read_pickle(analytics_path / model_filename)
+
+    # Without a source the feature set is scored, a new resale flat prices file
+    # is cleaned and matched against the reference data chunk by chunk
+    source = config.get_scoring_setting("Source")
+    df_market_features: Optional[pd.DataFrame] = None
+    if source:
+        source_path = Path(source)
+        columns = resale_flat_prices_columns
+        reference_data: Optional[ReferenceData] = read_reference_data()
+
+        if config.get_market_features_setting("Enabled") == "True":
+            df_market_features = _compute_market_features(source_path)
+    else:
+        source_path = config.get_location("TransformedAnalytics") / feature_set_filename
+        columns = _get_feature_set_columns()
+        reference_data = None
+
+    output_path = analytics_path / "predictions" / source_path.stem
+    storage.ensure_directory(output_path)
+
+    chunk_size = int(config.get_scoring_setting("ChunkSize"))
+    n_jobs = effective_n_jobs(int(config.get_scoring_setting("Jobs")))
+    log.info(f"Scoring {source_path} in chunks of {chunk_size} rows (n_jobs: {n_jobs})")
+
+    # The chunks share one model in threads, the forest releases the GIL while
+    # predicting and a copy per process would multiply its memory. Only a few
+    # chunks are read ahead, so memory stays flat however large the source is.
+    # The threads score with the configuration of this run.
+    score_chunk = config.in_current_context(_score_chunk)
+    parts = []
+    pending: collections.deque[Future] = collections.deque()
+    with _read_csv_chunks(
+        source_path, columns, chunk_size
+    ) as chunks, ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        for chunk in chunks:
+            pending.append(
+                executor.submit(
+                    score_chunk, model, chunk, reference_data, df_market_features
+                )
+            )
+
+            # Parts are written in order, reading waits while enough chunks are in flight
+            if len(pending) >= 2 * n_jobs:
+                parts.append(
+                    _write_part(pending.popleft().result(), output_path, len(parts))
+                )
+
+        while pending:
+            parts.append(
+                _write_part(pending.popleft().result(), output_path, len(parts))
+            )
+
+    # Parts of an earlier, larger run may still be around, the manifest lists
+    # the parts of this run
+    manifest = {
+        "source": source_path.as_posix(),
+        "rows": sum(part["rows"] for part in parts),
+        "mean_absolute_residual": (
+            sum(part["absolute_residual_sum"] for part in parts)
+            / max(1, sum(part["rows"] for part in parts))
+        ),
+        "parts": parts,
+    }
+    storage.write_json(manifest, output_path / manifest_filename)
+
+    log.info(f"Scored {manifest['rows']} rows into {len(parts)} parts")
+    run_report.add_section(
+        "scoring", {key: value for key, value in manifest.items() if key != "parts"}
+    )
+
+
+def _get_feature_set_columns() -> Columns:
+    # The columns of the feature set scoring reads, which features there are
+    # depends on the configuration
+    return {
+        "town": "string",
+        "block": "string",
+        "street_name": "string",
+        "room_no": None,
+        "flat_model": "string",
+        **{column: "float64" for column in get_feature_columns()},
+        TARGET_COLUMN: "float64",
+    }
+
+
+def _compute_market_features(source_path: Path) -> pd.DataFrame:
+    # The market of a new transaction is made of the transactions before it, from
+    # the history and the whole source, whichever chunk they end up in. Only the
+    # few columns the features need are read, by row position like the chunks.
+    df_source = file_storage.get_storage().read_dataframe(
+        source_path,
+        {
+            column: resale_flat_prices_columns[column]
+            for column in ["month", "town", "flat_type", "floor_area_sqm"]
+            + ["resale_price"]
+        },
+    )
+    df_source["month"] = normalize_months(df_source["month"])
+
+    df_source = add_market_features(
+        df_source,
+        int(config.get_market_features_setting("WindowMonths")),
+        read_market_history(),
+    )
+
+    return df_source[MARKET_FEATURE_COLUMNS]
+
+
+@contextlib.contextmanager
+def _read_csv_chunks(
+    path: Path, columns: Columns, chunk_size: int
+) -> Iterator[Iterator[pd.DataFrame]]:
+    with file_storage.get_storage().open_stream(path) as stream:
+        yield pd.read_csv(
+            stream,
+            usecols=list(columns),
+            dtype={column: dtype for column, dtype in columns.items() if dtype},
+            chunksize=chunk_size,
+        )
+
+
+def _score_chunk(
+    model: Any,
+    df_chunk: pd.DataFrame,
+    reference_data: Optional[ReferenceData],
+    df_market_features: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    if reference_data is not None:
+        df_cleaned = get_cleaned_resale_prices(df_chunk)
+        if df_market_features is not None:
+            # Chunks keep the row positions of the source in their index
+            df_cleaned = df_cleaned.join(df_market_features)
+        df_chunk = build_feature_set(df_cleaned, reference_data)
+
+    X, y = to_feature_matrix(df_chunk)
+
+    # Many flats share the same profile, every profile is only predicted once.
+    # A chunk without any located flat still gets its (empty) part.
+    predicted = np.zeros(0)
+    if len(X):
+        X_unique, inverse = np.unique(X, axis=0, return_inverse=True)
+        predicted = model.predict(X_unique)[inverse.reshape(-1)]
+
+    df_predictions = df_chunk[prediction_columns].reset_index(drop=True)
+    df_predictions[TARGET_COLUMN] = y
+    df_predictions["predicted_price"] = predicted
+    df_predictions["residual"] = y - predicted
+
+    return df_predictions
+
+
+def _write_part(df_predictions: pd.DataFrame, output_path: Path, index: int) -> dict:
+    part_filename = f"part-{index:05d}.csv"
+
+    # Written as plain bytes, so that the parts don't fill the storage cache
+    file_storage.get_storage().write_bytes(
+        df_predictions.to_csv(index=False).encode("utf-8"),
+        output_path / part_filename,
+    )
+
+    return {
+        "file": part_filename,
+        "rows": len(df_predictions),
+        "absolute_residual_sum": float(df_predictions["residual"].abs().sum()),
+    }
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from unittest.mock import Mock
+
+from dp_plain_python.transform.run_analytics_transform import ReferenceData
+from dp_plain_python.utils.feature_matrix import FEATURE_COLUMNS, TARGET_COLUMN
+from .run_scoring import _score_chunk, prediction_columns
+
+
+def test_score_chunk_predicts_each_profile_once():
+    rng = np.random.default_rng(42)
+    rows = 12
+    df_chunk = pd.DataFrame(
+        {
+            "town": "BEDOK",
+            "block": [str(i) for i in range(rows)],
+            "street_name": "STREET 0",
+            "room_no": 4,
+            "flat_model": "Model A",
+            # Only three different flat profiles
+            "x": rng.integers(0, 3, rows).astype(float),
+            "resale_price": rng.uniform(200_000, 900_000, rows),
+        }
+    )
+    for column in FEATURE_COLUMNS:
+        df_chunk[column] = df_chunk["x"]
+    model = Mock()
+    model.predict.side_effect = lambda X: X.sum(axis=1) * 1000
+
+    df_predictions = _score_chunk(model, df_chunk, None)
+
+    assert len(model.predict.call_args.args[0]) == df_chunk["x"].nunique()
+    expected = df_chunk["x"].to_numpy() * len(FEATURE_COLUMNS) * 1000
+    np.testing.assert_allclose(df_predictions["predicted_price"], expected)
+    np.testing.assert_allclose(
+        df_predictions["residual"], df_chunk["resale_price"] - expected
+    )
+    assert df_predictions["block"].tolist() == df_chunk["block"].tolist()
+
+
+def test_score_chunk_without_located_flats_is_empty():
+    df_chunk = pd.DataFrame(
+        {
+            "month": ["2017-01"],
+            "town": ["BEDOK"],
+            "flat_type": ["4 ROOM"],
+            "block": ["999Z"],
+            "street_name": ["UNKNOWN STREET"],
+            "storey_range": ["01 TO 03"],
+            "floor_area_sqm": [90.0],
+            "flat_model": ["Model A"],
+            "lease_commence_date": [1990],
+            "remaining_lease": ["70 years"],
+            "resale_price": [400_000.0],
+        }
+    )
+    locations = pd.DataFrame({"name": ["A"], "latitude": [1.3], "longitude": [103.8]})
+    reference_data = ReferenceData(
+        mrt_stations=locations,
+        malls=locations,
+        addresses=pd.DataFrame(
+            {
+                "block": ["1"],
+                "street_name": ["STREET 0"],
+                "latitude": [1.3],
+                "longitude": [103.8],
+            }
+        ),
+    )
+    model = Mock()
+
+    df_predictions = _score_chunk(model, df_chunk, reference_data)
+
+    model.predict.assert_not_called()
+    assert len(df_predictions) == 0
+    assert list(df_predictions.columns) == [
+        *prediction_columns,
+        TARGET_COLUMN,
+        "predicted_price",
+        "residual",
+    ]
@@ -1,13 +1,16 @@
-from fastapi import FastAPI
-from dp_plain_python.run_all import main
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query
+from dp_plain_python.run_all import run_pipeline
 from dp_plain_python.environment import config
+from dp_plain_python.analytics.run_aggregation import read_price_cube
+from dp_plain_python.utils.price_cube import CUBE_DIMENSIONS, query_price_cube
 
 app = FastAPI()
 
 
 @app.post("/run")
 async def run():
-    main()
+    run_pipeline()
 
     return {"message": "Data pipeline completed successfully!"}
 
@@ -15,3 +18,44 @@ async def run():
 @app.get("/test")
 async def test():
     return {"message": "Alive"}
+
+
+@app.get("/aggregates")
+async def aggregates(
+    town: Optional[list[str]] = Query(None),
+    room_no: Optional[list[int]] = Query(None),
+    flat_model: Optional[list[str]] = Query(None),
+    month_from: Optional[str] = None,
+    month_to: Optional[str] = None,
+    group_by: Optional[list[str]] = Query(None),
+):
+    # e.g. /aggregates?town=BEDOK&room_no=4&month_from=2020-01&group_by=month
+    # A cube left from earlier runs isn't kept up to date while the stage is disabled
+    if config.get_pipeline_setting("AggregationEnabled") != "True":
+        raise HTTPException(
+            status_code=404,
+            detail="The aggregation stage is disabled, set PIPELINE.AggregationEnabled",
+        )
+
+    price_cube = read_price_cube()
+    if price_cube is None:
+        raise HTTPException(
+            status_code=404, detail="No aggregates yet, run the aggregation stage"
+        )
+
+    unknown = [column for column in group_by or [] if column not in CUBE_DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Can't group by {unknown}, only by {CUBE_DIMENSIONS}",
+        )
+
+    df_aggregates = query_price_cube(
+        price_cube,
+        {"town": town, "room_no": room_no, "flat_model": flat_model},
+        month_from=month_from,
+        month_to=month_to,
+        group_by=group_by,
+    )
+
+    return {"aggregates": df_aggregates.to_dict(orient="records")}
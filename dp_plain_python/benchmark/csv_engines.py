@@ -0,0 +1,135 @@
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+from dp_plain_python.benchmark import synthetic_data
+from dp_plain_python.environment.file_storage import (
+    LocalFileStorage,
+    pyarrow_available,
+)
+
+log = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the CSV engines on the resale flat prices."
+    )
+    parser.add_argument(
+        "--file",
+        type=Path,
+        help="Resale flat prices CSV to parse, synthetic data is generated if not given",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1_000_000,
+        help="Number of synthetic resale rows to generate",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Parses per measurement, the best counts"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stdout,
+        format="%(levelname)s %(asctime)s - %(message)s",
+    )
+
+    with contextlib.ExitStack() as stack:
+        path = args.file
+        if path is None:
+            data_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+            synthetic_data.generate(data_dir, args.rows)
+            path = data_dir / synthetic_data.resale_flat_prices_filename
+
+        results = [
+            _benchmark_engine(path, engine, threads, args.repeat)
+            for engine, threads in _engine_configurations()
+        ]
+
+    _print_results(path, results)
+
+
+def _engine_configurations() -> Iterator[tuple[str, int]]:
+    # The C engine is single threaded, the pyarrow engine is measured with
+    # a growing number of threads to show how parsing scales with the cores
+    yield "c", 1
+
+    if not pyarrow_available():
+        log.warning("pyarrow is not available, only the C engine is benchmarked")
+        return
+
+    cores = os.cpu_count() or 1
+    threads = 1
+    while threads < cores:
+        yield "pyarrow", threads
+        threads *= 2
+    yield "pyarrow", cores
+
+
+def _benchmark_engine(path: Path, engine: str, threads: int, repeat: int) -> dict:
+    log.info(f"Parsing {path} with the {engine} engine on {threads} thread(s)")
+    storage = LocalFileStorage()
+
+    with _cpu_count(threads if engine == "pyarrow" else None):
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            df = storage.read_dataframe(path, engine=engine)
+            seconds.append(time.perf_counter() - start)
+
+    rows = len(df)
+    rows_per_second = rows / min(seconds)
+
+    return {
+        "engine": engine,
+        "threads": threads,
+        "rows": rows,
+        "seconds": min(seconds),
+        "rows_per_second": rows_per_second,
+        "rows_per_second_per_core": rows_per_second / threads,
+    }
+
+
+@contextlib.contextmanager
+def _cpu_count(threads: Optional[int]) -> Iterator[None]:
+    if threads is None:
+        yield
+        return
+
+    import pyarrow
+
+    previous = pyarrow.cpu_count()
+    pyarrow.set_cpu_count(threads)
+    try:
+        yield
+    finally:
+        pyarrow.set_cpu_count(previous)
+
+
+def _print_results(path: Path, results: list[dict]) -> None:
+    size = path.stat().st_size
+    lines = [
+        f"{'engine':<10} {'threads':>8} {'seconds':>10} {'rows/s':>12} "
+        f"{'rows/s/core':>12} {'MiB/s':>8}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['engine']:<10} {result['threads']:>8} "
+            f"{result['seconds']:>10.2f} {result['rows_per_second']:>12.0f} "
+            f"{result['rows_per_second_per_core']:>12.0f} "
+            f"{size / 2**20 / result['seconds']:>8.0f}"
+        )
+
+    log.info(f"CSV parse throughput for {path}:\n" + "\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import configparser
+import contextlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlparse
+from dp_plain_python.benchmark import synthetic_data
+
+log = logging.getLogger(__name__)
+
+stages = ["extract", "load", "transform_analytics", "analytics", "scoring"]
+
+_package_root = Path(__file__).resolve().parents[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline stages on synthetic data."
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="Number of resale rows to generate, one benchmark per value",
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=Path("config.ini"),
+        help="Pipeline config used as a template, locations and sources are replaced",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=Path("benchmark_baseline.json")
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative throughput drop or memory increase versus the baseline",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--workdir", type=Path, help="Keep generated data and outputs in this directory"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stdout,
+        format="%(levelname)s %(asctime)s - %(message)s",
+    )
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or Path(
+            stack.enter_context(tempfile.TemporaryDirectory())
+        )
+
+        results = {
+            str(rows): _benchmark_scale(workdir / f"rows_{rows}", rows, args.config)
+            for rows in args.rows
+        }
+
+    _print_results(results)
+
+    if args.update_baseline:
+        log.info(f"Writing baseline to {args.baseline}")
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        return
+
+    if not args.baseline.exists():
+        log.info(f"No baseline at {args.baseline}, skipping regression check")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = _find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        log.error(regression)
+    if regressions:
+        sys.exit(1)
+
+
+def _benchmark_scale(workdir: Path, rows: int, config_template: Path) -> dict:
+    data_dir = workdir / "data"
+    synthetic_data.generate(data_dir, rows)
+
+    with _serve_overpass(data_dir) as overpass_endpoint:
+        _write_config(workdir, data_dir, overpass_endpoint, config_template)
+
+        results = {}
+        for stage in stages:
+            log.info(f"Benchmarking {stage} on {rows} rows")
+            measurement = _run_stage(workdir, stage)
+            measurement["rows_per_second"] = rows / measurement["seconds"]
+            results[stage] = measurement
+
+    return results
+
+
+def _run_stage(workdir: Path, stage: str) -> dict[str, Any]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(_package_root), env.get("PYTHONPATH")])
+    )
+
+    completed = subprocess.run(
+        [sys.executable, "-m", "dp_plain_python.benchmark.run_stage", stage],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"Stage {stage} failed:\n{completed.stderr}")
+
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _write_config(
+    workdir: Path, data_dir: Path, overpass_endpoint: str, config_template: Path
+) -> None:
+    config = configparser.ConfigParser()
+    config.optionxform = str  # type: ignore
+    config.read(config_template)
+
+    config["FILE_ACCESS"]["Mode"] = "Local"
+    for location in config["LOCATIONS"]:
+        config["LOCATIONS"][location] = str(workdir / "local_data" / location.lower())
+
+    config["SOURCEFILE_PATHS"]["ResaleFlatPrices"] = str(
+        data_dir / synthetic_data.resale_flat_prices_filename
+    )
+    config["SOURCEFILE_PATHS"]["MrtStations"] = str(
+        data_dir / synthetic_data.mrt_stations_filename
+    )
+    config["SOURCEFILE_PATHS"]["HdbAddressGeodata"] = str(
+        data_dir / synthetic_data.address_geodata_filename
+    )
+    config["API_ENDPOINTS"]["Overpass"] = overpass_endpoint
+    config["GEOCODING"]["Enabled"] = "False"
+    config["SAMPLING"]["Enabled"] = "False"
+    config["SCORING"]["Source"] = ""
+    config["ANALYTICS"]["SearchMode"] = "None"
+
+    with open(workdir / "config.ini", "w", encoding="utf-8") as f:
+        config.write(f)
+
+
+@contextlib.contextmanager
+def _serve_overpass(data_dir: Path) -> Iterator[str]:
+    # Stands in for the Overpass API, answers mall queries with the synthetic
+    # mall geodata and everything else with the MRT geodata
+    class OverpassHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get("data", [""])[0]
+            filename = (
+                synthetic_data.mall_geodata_filename
+                if '"shop"="mall"' in query
+                else synthetic_data.mrt_geodata_filename
+            )
+            payload = (data_dir / filename).read_bytes()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OverpassHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/api/interpreter"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _find_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+
+    for rows, stage_results in results.items():
+        for stage, measurement in stage_results.items():
+            reference = baseline.get(rows, {}).get(stage)
+            if reference is None:
+                continue
+
+            if measurement["rows_per_second"] < reference["rows_per_second"] * (
+                1 - tolerance
+            ):
+                regressions.append(
+                    f"{stage} on {rows} rows: throughput dropped from "
+                    f"{reference['rows_per_second']:.0f} to "
+                    f"{measurement['rows_per_second']:.0f} rows/s"
+                )
+            if measurement["peak_memory_bytes"] > reference["peak_memory_bytes"] * (
+                1 + tolerance
+            ):
+                regressions.append(
+                    f"{stage} on {rows} rows: peak memory grew from "
+                    f"{reference['peak_memory_bytes'] / 2**20:.0f} to "
+                    f"{measurement['peak_memory_bytes'] / 2**20:.0f} MiB"
+                )
+
+    return regressions
+
+
+def _print_results(results: dict) -> None:
+    lines = [
+        f"{'rows':>10} {'stage':<20} {'seconds':>10} {'rows/s':>12} {'peak MiB':>10}"
+    ]
+    for rows, stage_results in results.items():
+        for stage, measurement in stage_results.items():
+            lines.append(
+                f"{rows:>10} {stage:<20} {measurement['seconds']:>10.2f} "
+                f"{measurement['rows_per_second']:>12.0f} "
+                f"{measurement['peak_memory_bytes'] / 2**20:>10.0f}"
+            )
+
+    log.info("Benchmark results:\n" + "\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import json
+import resource
+import sys
+import time
+
+# Runs a single pipeline stage in its own process, so that every stage
+# reads the benchmark's config.ini and has its own peak memory.
+# Prints the measurement as JSON on the last line of stdout.
+
+
+def main():
+    stage = sys.argv[1]
+
+    if stage == "extract":
+        from dp_plain_python.extract.run_extract import extract_into_staging as run
+    elif stage == "load":
+        from dp_plain_python.load.run_load import load_into_storage as run
+    elif stage == "transform_analytics":
+        from dp_plain_python.transform.run_analytics_transform import (
+            transform_for_analytics as run,
+        )
+    elif stage == "analytics":
+        from dp_plain_python.analytics.run_analytics import run_analytics as run
+    elif stage == "scoring":
+        from dp_plain_python.analytics.run_scoring import run_scoring as run
+    else:
+        raise ValueError(f"{stage} is not a pipeline stage that can be benchmarked.")
+
+    start = time.perf_counter()
+    run()
+    duration = time.perf_counter() - start
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    print(json.dumps({"seconds": duration, "peak_memory_bytes": peak_memory}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import json
+import logging
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+resale_flat_prices_filename = "resale_flat_prices.csv"
+mrt_stations_filename = "mrt_stations.xlsx"
+mrt_geodata_filename = "mrt_geodata.json"
+mall_geodata_filename = "mall_geodata.json"
+address_geodata_filename = "address_geolocations.csv"
+
+towns = [
+    "ANG MO KIO",
+    "BEDOK",
+    "BISHAN",
+    "BUKIT BATOK",
+    "CLEMENTI",
+    "HOUGANG",
+    "JURONG WEST",
+    "PUNGGOL",
+    "SENGKANG",
+    "TAMPINES",
+    "TOA PAYOH",
+    "WOODLANDS",
+    "YISHUN",
+]
+flat_types = ["2 ROOM", "3 ROOM", "4 ROOM", "5 ROOM", "EXECUTIVE", "MULTI-GENERATION"]
+flat_models = ["Improved", "New Generation", "Model A", "Standard", "Premium Apartment"]
+
+# Rough bounding box of Singapore
+_latitude_range = (1.25, 1.45)
+_longitude_range = (103.65, 103.98)
+
+
+def generate(output_dir: Path, rows: int, seed: int = 1337) -> None:
+    # Writes a complete set of source files with the same layout as the real ones,
+    # the number of addresses, stations and malls grows with the number of resale rows
+    rng = np.random.default_rng(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    stations = max(20, min(300, rows // 10_000))
+    malls = max(10, min(500, rows // 5_000))
+    addresses = max(100, rows // 50)
+
+    log.info(
+        f"Generating {rows} resale rows, {addresses} addresses, "
+        f"{stations} MRT stations and {malls} malls into {output_dir}"
+    )
+
+    df_addresses = _generate_addresses(rng, addresses)
+    df_addresses.to_csv(output_dir / address_geodata_filename, index=False)
+
+    _generate_resale_flat_prices(rng, rows, df_addresses).to_csv(
+        output_dir / resale_flat_prices_filename, index=False
+    )
+
+    _generate_mrt_stations(stations).to_excel(
+        output_dir / mrt_stations_filename, sheet_name="Sheet1", index=False
+    )
+
+    with open(output_dir / mrt_geodata_filename, "w", encoding="utf-8") as f:
+        json.dump(_generate_mrt_geodata(rng, stations), f)
+    with open(output_dir / mall_geodata_filename, "w", encoding="utf-8") as f:
+        json.dump(_generate_mall_geodata(rng, malls), f)
+
+
+def _generate_addresses(rng: np.random.Generator, addresses: int) -> pd.DataFrame:
+    index = np.arange(addresses)
+
+    return pd.DataFrame(
+        {
+            "block": (index % 1000 + 1).astype(str),
+            "street_name": "STREET " + pd.Series(index // 1000).astype(str),
+            "latitude": rng.uniform(*_latitude_range, addresses),
+            "longitude": rng.uniform(*_longitude_range, addresses),
+            "postal_code": rng.integers(100000, 830000, addresses),
+            "confidence": np.where(rng.random(addresses) < 0.98, 1.0, 0.5),
+            "type": np.where(rng.random(addresses) < 0.98, "address", "street"),
+        }
+    )
+
+
+def _generate_resale_flat_prices(
+    rng: np.random.Generator, rows: int, df_addresses: pd.DataFrame
+) -> pd.DataFrame:
+    address = rng.integers(len(df_addresses), size=rows)
+    year = rng.integers(2017, 2024, rows)
+    month = rng.integers(1, 13, rows)
+    lease_commence_date = rng.integers(1966, 2020, rows)
+    remaining_years = np.clip(99 - (year - lease_commence_date) - 1, 1, 98)
+    remaining_months = rng.integers(0, 12, rows)
+    storey_lower = rng.integers(0, 17, rows) * 3 + 1
+    floor_area_sqm = rng.integers(35, 180, rows).astype(float)
+
+    two_digits = np.array([f"{i:02d}" for i in range(100)], dtype=object)
+    storey_range = (
+        two_digits[storey_lower] + " TO " + two_digits[storey_lower + 2]
+    ).astype(str)
+    remaining_lease = np.where(
+        remaining_months > 0,
+        two_digits[remaining_years]
+        + " years "
+        + two_digits[remaining_months]
+        + " months",
+        two_digits[remaining_years] + " years",
+    )
+    price = (
+        floor_area_sqm * 4_500
+        + remaining_years * 1_500
+        + rng.normal(0, 40_000, rows)
+        + 100_000
+    ).round(-3)
+
+    return pd.DataFrame(
+        {
+            "month": pd.Series(year).astype(str) + "-" + two_digits[month],
+            "town": np.array(towns)[rng.integers(len(towns), size=rows)],
+            "flat_type": np.array(flat_types)[rng.integers(len(flat_types), size=rows)],
+            "block": df_addresses["block"].to_numpy()[address],
+            "street_name": df_addresses["street_name"].to_numpy()[address],
+            "storey_range": storey_range,
+            "floor_area_sqm": floor_area_sqm,
+            "flat_model": np.array(flat_models)[
+                rng.integers(len(flat_models), size=rows)
+            ],
+            "lease_commence_date": lease_commence_date,
+            "remaining_lease": remaining_lease,
+            "resale_price": np.maximum(price, 150_000),
+        }
+    )
+
+
+def _generate_mrt_stations(stations: int) -> pd.DataFrame:
+    # Interchanges are listed once per line and a few stations are still planned
+    names = [f"Station {i}" for i in range(stations)]
+    codes = [f"NS{i}" if i % 7 else f"NS{i} EW{i}" for i in range(stations)]
+    openings = ["2000-01-01" if i % 13 else "mid-2034" for i in range(stations)]
+
+    return pd.DataFrame(
+        {
+            "Name": names + names[:5],
+            "Code": codes + [f"EW{i}" for i in range(5)],
+            "Opening": openings + openings[:5],
+        }
+    )
+
+
+def _generate_mrt_geodata(rng: np.random.Generator, stations: int) -> dict:
+    # Real Overpass results carry lots of tags the pipeline never uses
+    elements = [
+        {
+            "type": "node",
+            "id": i,
+            "lat": rng.uniform(*_latitude_range),
+            "lon": rng.uniform(*_longitude_range),
+            "tags": {
+                "name": f"Station {i}",
+                "name:zh": f"站 {i}",
+                "railway": "stop",
+                "subway": "yes",
+                "network": "Singapore MRT",
+                "wheelchair": "yes",
+            },
+        }
+        for i in range(stations)
+    ]
+
+    return {"version": 0.6, "generator": "synthetic", "elements": elements}
+
+
+def _generate_mall_geodata(rng: np.random.Generator, malls: int) -> dict:
+    elements = []
+    for i in range(malls):
+        tags = {
+            "name": f"Mall {i}",
+            "shop": "mall",
+            "addr:street": f"STREET {i}",
+            "opening_hours": "Mo-Su 10:00-22:00",
+        }
+        lat = rng.uniform(*_latitude_range)
+        lon = rng.uniform(*_longitude_range)
+
+        if i % 2:
+            elements.append(
+                {"type": "node", "id": i, "lat": lat, "lon": lon, "tags": tags}
+            )
+        else:
+            elements.append(
+                {
+                    "type": "way",
+                    "id": i,
+                    "center": {"lat": lat, "lon": lon},
+                    "nodes": [1, 2, 3, 1],
+                    "tags": tags,
+                }
+            )
+
+    return {"version": 0.6, "generator": "synthetic", "elements": elements}
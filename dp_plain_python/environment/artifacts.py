@@ -0,0 +1,32 @@
+import contextvars
+import logging
+from typing import Any, Optional
+
+log = logging.getLogger(__name__)
+
+# Results handed from one stage to the next when both run in the same process.
+# Stages still persist everything through FileStorage, this only saves re-reading it.
+# Runs of several configurations in one process each hand over their own.
+_artifacts: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar("artifacts")
+
+
+def publish(name: str, artifact: Any) -> None:
+    log.info(f"Publishing in-memory artifact {name}")
+    _get_artifacts()[name] = artifact
+
+
+def get(name: str) -> Optional[Any]:
+    return _get_artifacts().get(name)
+
+
+def discard(name: str) -> None:
+    _get_artifacts().pop(name, None)
+
+
+def _get_artifacts() -> dict[str, Any]:
+    artifacts = _artifacts.get(None)
+    if artifacts is None:
+        artifacts = {}
+        _artifacts.set(artifacts)
+
+    return artifacts
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+from dp_plain_python.environment import config, file_storage
+
+log = logging.getLogger(__name__)
+
+
+def is_complete(
+    step: str,
+    inputs: Optional[list[Path]] = None,
+    settings: Optional[dict[str, Any]] = None,
+) -> bool:
+    # A step is complete if it finished with the same inputs and settings, and none
+    # of the files it wrote, or its inputs, changed or went missing since
+    marker = _read_marker(step)
+    if marker is None or marker["status"] != "complete":
+        return False
+
+    if marker.get("signature") != _signature(inputs, settings):
+        log.info(f"Step {step} is incomplete, its inputs or settings changed")
+        return False
+
+    storage = file_storage.get_storage()
+    files = {**marker["inputs"], **marker["outputs"]}
+    for path, fingerprint in files.items():
+        if storage.fingerprint(path) != fingerprint:
+            log.info(f"Step {step} is incomplete, {path} changed since it completed")
+            return False
+
+    return True
+
+
+def run_step(
+    step: str,
+    run: Callable[[], None],
+    inputs: Optional[list[Path]] = None,
+    settings: Optional[dict[str, Any]] = None,
+) -> None:
+    # The marker only says complete once the step returned, a step that fails or is
+    # interrupted is run again
+    _write_marker(step, {"status": "running", "started": datetime.now().isoformat()})
+
+    with file_storage.record_writes() as written:
+        run()
+
+    _write_marker(
+        step,
+        {
+            "status": "complete",
+            "completed": datetime.now().isoformat(),
+            "signature": _signature(inputs, settings),
+            "inputs": _fingerprints(inputs or []),
+            "outputs": _fingerprints(sorted(written)),
+        },
+    )
+
+
+def invalidate(step: str) -> None:
+    # Used for the steps after one that runs again, their inputs are about to change
+    if _read_marker(step) is not None:
+        _write_marker(step, {"status": "invalidated"})
+
+
+def _signature(inputs: Optional[list[Path]], settings: Optional[dict[str, Any]]) -> str:
+    # Which inputs a step reads and the settings it runs with, as opposed to
+    # the content of the inputs, which their fingerprints cover
+    signature = json.dumps(
+        {
+            "inputs": sorted(Path(path).as_posix() for path in inputs or []),
+            "settings": settings or {},
+        },
+        sort_keys=True,
+    )
+
+    return hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+
+def _fingerprints(paths: list[Any]) -> dict[str, Optional[str]]:
+    storage = file_storage.get_storage()
+
+    return {Path(path).as_posix(): storage.fingerprint(path) for path in paths}
+
+
+def _read_marker(step: str) -> Optional[dict[str, Any]]:
+    storage = file_storage.get_storage()
+    path = config.get_location("Checkpoints") / f"{step}.json"
+    if not storage.exists(path):
+        return None
+
+    return storage.read_json(path)
+
+
+def _write_marker(step: str, marker: dict[str, Any]) -> None:
+    storage = file_storage.get_storage()
+    checkpoints_path = config.get_location("Checkpoints")
+
+    storage.ensure_directory(checkpoints_path)
+    storage.write_json({"step": step, **marker}, checkpoints_path / f"{step}.json")
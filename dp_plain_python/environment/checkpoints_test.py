@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from dp_plain_python.environment.file_storage import LocalFileStorage
+from . import checkpoints, config, file_storage
+
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path, monkeypatch):
+    storage = LocalFileStorage()
+    monkeypatch.setattr(file_storage, "get_storage", lambda: storage)
+    monkeypatch.setattr(config, "get_location", lambda _: tmp_path / "checkpoints")
+    return storage
+
+
+def test_step_is_complete_until_output_changes(tmp_path, storage):
+    path = tmp_path / "output.csv"
+
+    checkpoints.run_step(
+        "step", lambda: storage.write_dataframe(pd.DataFrame({"a": [1]}), path)
+    )
+    assert checkpoints.is_complete("step")
+
+    path.write_text("truncated")
+    assert not checkpoints.is_complete("step")
+
+
+def test_failed_or_invalidated_step_is_incomplete(tmp_path):
+    def fail():
+        raise RuntimeError("crash")
+
+    with pytest.raises(RuntimeError):
+        checkpoints.run_step("failing", fail)
+    checkpoints.run_step("invalidated", lambda: None)
+    checkpoints.invalidate("invalidated")
+
+    assert not checkpoints.is_complete("failing")
+    assert not checkpoints.is_complete("invalidated")
+    assert not checkpoints.is_complete("never_run")
+
+
+def test_step_is_incomplete_with_other_inputs_or_settings(tmp_path):
+    inputs = [tmp_path / "source.csv"]
+    settings = {"WALKING_NETWORK": {"enabled": "False"}}
+
+    checkpoints.run_step("step", lambda: None, inputs, settings)
+    assert checkpoints.is_complete("step", inputs, settings)
+
+    assert not checkpoints.is_complete(
+        "step", inputs, {"WALKING_NETWORK": {"enabled": "True"}}
+    )
+    assert not checkpoints.is_complete(
+        "step", [*inputs, tmp_path / "walking_network.json"], settings
+    )
@@ -1,11 +1,27 @@
 import configparser
+import contextlib
+import contextvars
+import hashlib
 from pathlib import Path
 import os
-from typing import Literal
+from typing import Callable, Iterator, Literal, TypeVar, Union
 
 _config_path = Path(os.getcwd()) / "config.ini"
-_config = configparser.ConfigParser()
-_config.read(_config_path)
+
+_T = TypeVar("_T")
+
+
+def _read_config(path: Path) -> configparser.ConfigParser:
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    return parser
+
+
+# Settings come from config.ini in the working directory, runs of other
+# configurations in the same process switch to their own, see use_config
+_config: contextvars.ContextVar[configparser.ConfigParser] = contextvars.ContextVar(
+    "config", default=_read_config(_config_path)
+)
 
 _config_section_locations = "LOCATIONS"
 _config_section_sourcefile_paths = "SOURCEFILE_PATHS"
@@ -14,9 +30,30 @@ _config_section_logging = "LOGGING"
 _config_section_pipeline = "PIPELINE"
 _config_section_api_endpoints = "API_ENDPOINTS"
 _config_section_file_access = "FILE_ACCESS"
-
-_location = Literal["Staging", "Storage", "TransformedAnalytics", "Analytics"]
-_sourcefiles = Literal["ResaleFlatPrices", "MrtStations", "HdbAddressGeodata"]
+_config_section_analytics = "ANALYTICS"
+_config_section_geocoding = "GEOCODING"
+_config_section_csv_engines = "CSV_ENGINES"
+_config_section_sampling = "SAMPLING"
+_config_section_profiling = "PROFILING"
+_config_section_scoring = "SCORING"
+_config_section_aggregation = "AGGREGATION"
+_config_section_walking_network = "WALKING_NETWORK"
+_config_section_market_features = "MARKET_FEATURES"
+
+_location = Literal[
+    "Staging",
+    "Storage",
+    "TransformedAnalytics",
+    "Analytics",
+    "GeocodingCache",
+    "ExcelCache",
+    "Checkpoints",
+    "Profiles",
+    "NetworkCache",
+]
+_sourcefiles = Literal[
+    "ResaleFlatPrices", "MrtStations", "HdbAddressGeodata", "WalkingNetwork"
+]
 _storage_file = Literal[
     "ResaleFlatPrices",
     "MrtStations",
@@ -30,37 +67,159 @@ _pipeline = Literal[
     "LoadEnabled",
     "TransformAnalyticsEnabled",
     "AnalyticsEnabled",
+    "EvaluationEnabled",
+    "ScoringEnabled",
+    "AggregationEnabled",
+    "ResumeEnabled",
+]
+_endpoint = Literal["Overpass", "Geocoding"]
+_file_access = Literal[
+    "Mode", "S3Bucket", "S3MaxPoolConnections", "CacheEnabled", "CacheMaxBytes"
 ]
-_endpoint = Literal["Overpass"]
-_file_access = Literal["Mode", "S3Bucket"]
+_analytics = Literal[
+    "PersistFeatureMatrix",
+    "CrossValidationFolds",
+    "CrossValidationJobs",
+    "SearchMode",
+    "SearchTrials",
+    "SearchJobs",
+]
+_geocoding = Literal["Enabled", "BatchSize", "MaxConcurrency", "MaxRetries"]
+_sampling = Literal["Enabled", "Fraction", "MaxRows", "Seed", "StratifyBy"]
+_profiling = Literal["Enabled", "Steps", "Top"]
+_scoring = Literal["Source", "ChunkSize", "Jobs"]
+_aggregation = Literal["PriceBinWidth"]
+_walking_network = Literal["Enabled"]
+_market_features = Literal["Enabled", "WindowMonths"]
+_section = Literal[
+    "SOURCEFILE_PATHS",
+    "STORAGE_FILENAMES",
+    "API_ENDPOINTS",
+    "ANALYTICS",
+    "GEOCODING",
+    "CSV_ENGINES",
+    "SAMPLING",
+    "SCORING",
+    "AGGREGATION",
+    "WALKING_NETWORK",
+    "MARKET_FEATURES",
+]
+
+# Locations of the data derived from the resale flat prices. A sampled run gets
+# locations of its own, so that sampled and full datasets never mix.
+_sampled_locations = ["Storage", "TransformedAnalytics", "Analytics", "Checkpoints"]
+
+
+@contextlib.contextmanager
+def use_config(path: Union[Path, str]) -> Iterator[None]:
+    # Settings read in the meantime come from the given file, in this thread and
+    # context only. Locations in it are relative to the working directory.
+    if not Path(path).is_file():
+        raise FileNotFoundError(f"Config file {path} not found")
+
+    token = _config.set(_read_config(Path(path)))
+    try:
+        yield
+    finally:
+        _config.reset(token)
+
+
+def in_current_context(function: Callable[..., _T]) -> Callable[..., _T]:
+    # Worker threads start without the configuration of the run that started them,
+    # the returned function runs with it, and everything else the run set up
+    context = contextvars.copy_context()
+
+    return lambda *args, **kwargs: context.copy().run(function, *args, **kwargs)
 
 
 def get_location(location: _location) -> Path:
-    path = _config.get(_config_section_locations, location)
-    return Path(path)
+    path = Path(_get(_config_section_locations, location))
+
+    if location in _sampled_locations and get_sampling_setting("Enabled") == "True":
+        path = path.with_name(f"{path.name}_{_get_sample_name()}")
+
+    return path
 
 
 def get_file_access_setting(setting: _file_access):
-    return _config.get(_config_section_file_access, setting)
+    return _get(_config_section_file_access, setting)
 
 
 def get_sourcefile_path(sourcefile: _sourcefiles) -> Path:
-    path = _config.get(_config_section_sourcefile_paths, sourcefile)
+    path = _get(_config_section_sourcefile_paths, sourcefile)
     return Path(path)
 
 
 def get_storage_filename(file: _storage_file) -> Path:
-    path = _config.get(_config_section_storage_filenames, file)
+    path = _get(_config_section_storage_filenames, file)
     return Path(path)
 
 
 def get_logging_setting(setting: _logging) -> str:
-    return _config.get(_config_section_logging, setting)
+    return _get(_config_section_logging, setting)
 
 
 def get_pipeline_setting(setting: _pipeline) -> str:
-    return _config.get(_config_section_pipeline, setting)
+    return _get(_config_section_pipeline, setting)
 
 
 def get_api_endpoint(endpoint: _endpoint) -> str:
-    return _config.get(_config_section_api_endpoints, endpoint)
+    return _get(_config_section_api_endpoints, endpoint)
+
+
+def get_analytics_setting(setting: _analytics) -> str:
+    return _get(_config_section_analytics, setting)
+
+
+def get_geocoding_setting(setting: _geocoding) -> str:
+    return _get(_config_section_geocoding, setting)
+
+
+def get_csv_engine(file: _storage_file) -> str:
+    return _get(_config_section_csv_engines, file)
+
+
+def get_sampling_setting(setting: _sampling) -> str:
+    return _get(_config_section_sampling, setting)
+
+
+def get_profiling_setting(setting: _profiling) -> str:
+    return _get(_config_section_profiling, setting)
+
+
+def get_scoring_setting(setting: _scoring) -> str:
+    return _get(_config_section_scoring, setting)
+
+
+def get_aggregation_setting(setting: _aggregation) -> str:
+    return _get(_config_section_aggregation, setting)
+
+
+def get_walking_network_setting(setting: _walking_network) -> str:
+    return _get(_config_section_walking_network, setting)
+
+
+def get_market_features_setting(setting: _market_features) -> str:
+    return _get(_config_section_market_features, setting)
+
+
+def get_section(section: _section) -> dict[str, str]:
+    # All settings of a section, e.g. to tell whether any of them changed
+    parser = _config.get()
+    if not parser.has_section(section):
+        return {}
+
+    return dict(parser.items(section))
+
+
+def _get(section: str, setting: str) -> str:
+    return _config.get().get(section, setting)
+
+
+def _get_sample_name() -> str:
+    # Different sampling settings lead to different samples
+    settings = "|".join(
+        get_sampling_setting(setting)
+        for setting in ["Fraction", "MaxRows", "Seed", "StratifyBy"]
+    )
+    return f"sample_{hashlib.sha256(settings.encode()).hexdigest()[:8]}"
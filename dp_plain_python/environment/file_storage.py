@@ -1,9 +1,28 @@
 import abc
+import contextlib
+import contextvars
+import copy
+import functools
+import hashlib
 import io
 import json
+import os
 import shutil
 import tempfile
-from typing import Any, Union
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    BinaryIO,
+    ContextManager,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Union,
+)
+import numpy as np
 import pandas as pd
 from os import makedirs
 from pathlib import Path
@@ -11,32 +30,78 @@ from pandas import DataFrame
 import pickle
 import logging
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from dp_plain_python.environment import config
 
 log = logging.getLogger(__name__)
 
+# Columns to read and their dtypes, e.g. {"block": "string", "latitude": "float64"}.
+# A dtype of None leaves the type to be inferred.
+Columns = dict[str, Optional[str]]
+
+# Storages and S3 clients are shared by all stages of the process, creating them
+# (credentials, endpoint resolution, connection pools) is far from free
+_storages: dict[tuple[str, ...], "FileStorage"] = {}
+_s3_clients: dict[int, Any] = {}
+_registry_lock = threading.RLock()
+
+# Sets collecting the paths of completed writes, see record_writes
+_recorded_writes: contextvars.ContextVar[tuple[set[str], ...]] = contextvars.ContextVar(
+    "recorded_writes", default=()
+)
+
+_hash_chunk_size = 1 << 20
+
 
 class FileStorage(abc.ABC):
     @abc.abstractmethod
     def ensure_directory(self, path: Union[Path, str]) -> None:
         pass
 
+    @abc.abstractmethod
+    def exists(self, path: Union[Path, str]) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def list_files(self, path: Union[Path, str]) -> list[Path]:
+        pass
+
+    @abc.abstractmethod
+    def fingerprint(self, path: Union[Path, str]) -> Optional[str]:
+        # Changes whenever the file changes, None if it doesn't exist
+        pass
+
     @abc.abstractmethod
     def write_dataframe(self, dataframe: DataFrame, path: Union[Path, str]) -> None:
         pass
 
     @abc.abstractmethod
-    def read_dataframe(self, path: Union[Path, str]) -> DataFrame:
+    def read_dataframe(
+        self,
+        path: Union[Path, str],
+        columns: Optional[Columns] = None,
+        engine: str = "c",
+    ) -> DataFrame:
         pass
 
     @abc.abstractmethod
     def read_json(self, path: Union[Path, str]) -> Any:
         pass
 
+    @abc.abstractmethod
+    def open_stream(self, path: Union[Path, str]) -> ContextManager[BinaryIO]:
+        pass
+
     @abc.abstractmethod
     def write_json(self, data: Any, path: Union[Path, str]):
         pass
 
+    @abc.abstractmethod
+    def write_bytes(self, data: bytes, path: Union[Path, str]) -> None:
+        pass
+
     @abc.abstractmethod
     def read_excel(self, path: Union[Path, str], sheet: str) -> DataFrame:
         pass
@@ -45,6 +110,18 @@ class FileStorage(abc.ABC):
     def write_pickle(self, object: Any, path: Union[Path, str]) -> None:
         pass
 
+    @abc.abstractmethod
+    def read_pickle(self, path: Union[Path, str]) -> Any:
+        pass
+
+    @abc.abstractmethod
+    def write_array(self, array: np.ndarray, path: Union[Path, str]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def read_array(self, path: Union[Path, str], mmap: bool = False) -> np.ndarray:
+        pass
+
     @abc.abstractmethod
     def copy_file(
         self,
@@ -53,6 +130,39 @@ class FileStorage(abc.ABC):
     ) -> None:
         pass
 
+    def copy_files(
+        self,
+        files: list[tuple[Union[Path, str], Union[Path, str]]],
+        max_workers: int = 8,
+    ) -> None:
+        copy_file = config.in_current_context(lambda file: self.copy_file(*file))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Consume the results so that errors are raised here
+            list(executor.map(copy_file, files))
+
+    def write_dataframes(
+        self,
+        dataframes: list[tuple[DataFrame, Union[Path, str]]],
+        max_workers: int = 8,
+    ) -> None:
+        write_dataframe = config.in_current_context(
+            lambda item: self.write_dataframe(*item)
+        )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(write_dataframe, dataframes))
+
+    def content_hash(self, path: Union[Path, str]) -> str:
+        # Unlike the fingerprint, only changes when the content does
+        digest = hashlib.sha256()
+
+        with self.open_stream(path) as stream:
+            while chunk := stream.read(_hash_chunk_size):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
 
 class LocalFileStorage(FileStorage):
     def __init__(self) -> None:
@@ -62,13 +172,44 @@ class LocalFileStorage(FileStorage):
         log.info(f"Ensure directory {path}")
         makedirs(path, exist_ok=True)
 
+    def exists(self, path: Union[Path, str]) -> bool:
+        return Path(path).exists()
+
+    def list_files(self, path: Union[Path, str]) -> list[Path]:
+        if not Path(path).is_dir():
+            return []
+
+        # Temporary files of unfinished writes start with a dot
+        return sorted(
+            file
+            for file in Path(path).iterdir()
+            if file.is_file() and not file.name.startswith(".")
+        )
+
+    def fingerprint(self, path: Union[Path, str]) -> Optional[str]:
+        try:
+            stat = Path(path).stat()
+        except FileNotFoundError:
+            return None
+
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
     def write_dataframe(self, dataframe: DataFrame, path: Union[Path, str]) -> None:
         log.info(f"Write dataframe to {path}")
-        dataframe.to_csv(path, lineterminator="\n")
 
-    def read_dataframe(self, path: Union[Path, str]) -> DataFrame:
+        with _atomic_write(path) as tmp_path:
+            dataframe.to_csv(tmp_path, lineterminator="\n")
+
+    def read_dataframe(
+        self,
+        path: Union[Path, str],
+        columns: Optional[Columns] = None,
+        engine: str = "c",
+    ) -> DataFrame:
         log.info(f"Read dataframe from {path}")
-        return pd.read_csv(path)
+        return pd.read_csv(
+            path, **_read_csv_projection(columns), **_read_csv_engine(engine)
+        )
 
     def read_json(self, path: Union[Path, str]) -> Any:
         log.info(f"Read JSON data from {path}")
@@ -78,19 +219,49 @@ class LocalFileStorage(FileStorage):
 
         return data
 
+    def open_stream(self, path: Union[Path, str]) -> ContextManager[BinaryIO]:
+        log.info(f"Open stream from {path}")
+        return open(path, "rb")
+
     def write_json(self, data: Any, path: Union[Path, str]):
         log.info(f"Writing JSON data to {path}")
 
-        with open(path, "w", encoding="utf-8") as f:
+        with _atomic_write(path) as tmp_path, open(
+            tmp_path, "w", encoding="utf-8"
+        ) as f:
             json.dump(data, f, ensure_ascii=False)
 
+    def write_bytes(self, data: bytes, path: Union[Path, str]) -> None:
+        log.info(f"Writing bytes to {path}")
+
+        with _atomic_write(path) as tmp_path:
+            tmp_path.write_bytes(data)
+
     def read_excel(self, path: Union[Path, str], sheet: str) -> DataFrame:
         log.info(f"Read excel data from {path} (sheet: {sheet})")
         return pd.read_excel(path, sheet_name=sheet)
 
     def write_pickle(self, object: Any, path: Union[Path, str]) -> None:
         log.info(f"Writing pickled object to {path}")
-        pickle.dump(object, open(path, "wb"))
+
+        with _atomic_write(path) as tmp_path, open(tmp_path, "wb") as f:
+            pickle.dump(object, f)
+
+    def read_pickle(self, path: Union[Path, str]) -> Any:
+        log.info(f"Read pickled object from {path}")
+
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def write_array(self, array: np.ndarray, path: Union[Path, str]) -> None:
+        log.info(f"Writing array to {path}")
+
+        with _atomic_write(path) as tmp_path, open(tmp_path, "wb") as f:
+            np.save(f, array)
+
+    def read_array(self, path: Union[Path, str], mmap: bool = False) -> np.ndarray:
+        log.info(f"Read array from {path} (memory-mapped: {mmap})")
+        return np.load(path, mmap_mode="r" if mmap else None)
 
     def copy_file(
         self,
@@ -103,28 +274,82 @@ class LocalFileStorage(FileStorage):
         if dst.is_dir():
             dst = Path(dst_path) / src.name
 
+        # copy2 keeps the modification time, so an unchanged copy has the same stat
+        if dst.exists():
+            src_stat = src.stat()
+            dst_stat = dst.stat()
+            if (
+                src_stat.st_size == dst_stat.st_size
+                and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+            ):
+                log.info(f"Skipping copy of {src}, {dst} is unchanged")
+                _record_write(dst)
+                return
+
         log.info(f"Copying file {src} to {dst}")
 
-        shutil.copy(src, dst)
+        with _atomic_write(dst) as tmp_path:
+            shutil.copy2(src, tmp_path)
 
 
 class S3Storage(FileStorage):
-    def __init__(self, bucket_name: str) -> None:
+    def __init__(self, bucket_name: str, max_pool_connections: int = 10) -> None:
         self._tmp_dir = Path(tempfile.gettempdir())
 
         self._bucket_name = bucket_name
-        self._s3_client = boto3.client("s3")
+        self._max_pool_connections = max_pool_connections
+        self._s3_client = _get_s3_client(max_pool_connections)
+        self._transfer_config = TransferConfig(max_concurrency=max_pool_connections)
 
     def ensure_directory(self, _: Union[Path, str]) -> None:
         pass
 
-    def read_dataframe(self, src_path: Union[Path, str]) -> DataFrame:
+    def exists(self, path: Union[Path, str]) -> bool:
+        return self._head_object(path) is not None
+
+    def fingerprint(self, path: Union[Path, str]) -> Optional[str]:
+        head = self._head_object(path)
+
+        return None if head is None else f"{head['ContentLength']}-{head['ETag']}"
+
+    def _head_object(self, path: Union[Path, str]) -> Optional[dict]:
+        try:
+            return self._s3_client.head_object(
+                Bucket=self._bucket_name, Key=_s3_path(path)
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "404":
+                return None
+            raise
+
+    def list_files(self, path: Union[Path, str]) -> list[Path]:
+        prefix = _s3_path(path).rstrip("/") + "/"
+
+        paginator = self._s3_client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(
+            Bucket=self._bucket_name, Prefix=prefix, Delimiter="/"
+        )
+
+        return sorted(
+            Path(obj["Key"]) for page in pages for obj in page.get("Contents", [])
+        )
+
+    def read_dataframe(
+        self,
+        src_path: Union[Path, str],
+        columns: Optional[Columns] = None,
+        engine: str = "c",
+    ) -> DataFrame:
         src_path = _s3_path(src_path)
 
         log.info(f"Read dataframe from {src_path}")
 
         obj = self._s3_client.get_object(Bucket=self._bucket_name, Key=src_path)
-        df = pd.read_csv(io.BytesIO(obj["Body"].read()))
+        df = pd.read_csv(
+            io.BytesIO(obj["Body"].read()),
+            **_read_csv_projection(columns),
+            **_read_csv_engine(engine),
+        )
 
         return df
 
@@ -138,6 +363,19 @@ class S3Storage(FileStorage):
 
         return json.loads(data)
 
+    @contextlib.contextmanager
+    def open_stream(self, src_path: Union[Path, str]) -> Iterator[BinaryIO]:
+        src_path = _s3_path(src_path)
+
+        log.info(f"Open stream from {src_path}")
+
+        obj = self._s3_client.get_object(Bucket=self._bucket_name, Key=src_path)
+        body = obj["Body"]
+        try:
+            yield body
+        finally:
+            body.close()
+
     def write_dataframe(self, dataframe: DataFrame, dst_path: Union[Path, str]) -> None:
         dst_path = _s3_path(dst_path)
 
@@ -146,9 +384,7 @@ class S3Storage(FileStorage):
         csv_buffer = io.StringIO()
         dataframe.to_csv(csv_buffer, index=False)
 
-        self._s3_client.put_object(
-            Bucket=self._bucket_name, Key=dst_path, Body=csv_buffer.getvalue()
-        )
+        self._upload(csv_buffer.getvalue().encode("utf-8"), dst_path)
 
     def write_json(self, data: Any, dst_path: Union[Path, str]):
         dst_path = _s3_path(dst_path)
@@ -156,7 +392,13 @@ class S3Storage(FileStorage):
 
         bytes = json.dumps(data).encode("utf-8")
 
-        self._s3_client.put_object(Bucket=self._bucket_name, Key=dst_path, Body=bytes)
+        self._upload(bytes, dst_path)
+
+    def write_bytes(self, data: bytes, dst_path: Union[Path, str]) -> None:
+        dst_path = _s3_path(dst_path)
+        log.info(f"Writing bytes to {dst_path}")
+
+        self._upload(data, dst_path)
 
     def read_excel(self, src_path: Union[Path, str], sheet: str) -> DataFrame:
         src_path = _s3_path(src_path)
@@ -176,7 +418,33 @@ class S3Storage(FileStorage):
 
         bytes = pickle.dumps(obj)
 
-        self._s3_client.put_object(Bucket=self._bucket_name, Key=dst_path, Body=bytes)
+        self._upload(bytes, dst_path)
+
+    def read_pickle(self, src_path: Union[Path, str]) -> Any:
+        src_path = _s3_path(src_path)
+        log.info(f"Read pickled object from {src_path}")
+
+        obj = self._s3_client.get_object(Bucket=self._bucket_name, Key=src_path)
+
+        return pickle.loads(obj["Body"].read())
+
+    def write_array(self, array: np.ndarray, dst_path: Union[Path, str]) -> None:
+        dst_path = _s3_path(dst_path)
+        log.info(f"Writing array to {dst_path}")
+
+        buffer = io.BytesIO()
+        np.save(buffer, array)
+
+        self._upload(buffer.getvalue(), dst_path)
+
+    def read_array(self, src_path: Union[Path, str], mmap: bool = False) -> np.ndarray:
+        # Objects on S3 can't be memory-mapped, they are always loaded into memory
+        src_path = _s3_path(src_path)
+        log.info(f"Read array from {src_path}")
+
+        obj = self._s3_client.get_object(Bucket=self._bucket_name, Key=src_path)
+
+        return np.load(io.BytesIO(obj["Body"].read()))
 
     def copy_file(
         self,
@@ -186,16 +454,326 @@ class S3Storage(FileStorage):
         src_path = _s3_path(src_path)
         dst_path = _s3_path(dst_path)
 
-        print(f"Copying file from {src_path} to {dst_path}")
+        src_head = self._head_object(src_path)
+        if src_head is None:
+            raise FileNotFoundError(f"s3://{self._bucket_name}/{src_path}")
+
+        # The copy records the source ETag, because a copy of a multipart upload
+        # gets an ETag of its own. If size and ETag match, the copy is up to date.
+        dst_head = self._head_object(dst_path)
+        if (
+            dst_head is not None
+            and dst_head["ContentLength"] == src_head["ContentLength"]
+            and src_head["ETag"]
+            in (
+                dst_head["ETag"],
+                dst_head.get("Metadata", {}).get("source-etag"),
+            )
+        ):
+            log.info(f"Skipping copy of {src_path}, {dst_path} is unchanged")
+            _record_write(dst_path)
+            return
+
+        log.info(f"Copying file from {src_path} to {dst_path}")
 
         copy_source = {"Bucket": self._bucket_name, "Key": src_path}
 
-        s3 = boto3.resource("s3")
-        s3.meta.client.copy_object(
-            CopySource=copy_source,
-            Bucket=self._bucket_name,  # Destination bucket
-            Key=dst_path,  # Destination path/filename
+        self._s3_client.copy(
+            copy_source,
+            self._bucket_name,  # Destination bucket
+            dst_path,  # Destination path/filename
+            ExtraArgs={
+                "Metadata": {"source-etag": src_head["ETag"]},
+                "MetadataDirective": "REPLACE",
+                "ContentType": src_head.get("ContentType", "binary/octet-stream"),
+            },
+            Config=self._transfer_config,
+        )
+        _record_write(dst_path)
+
+    def _upload(self, body: bytes, dst_path: str) -> None:
+        # The managed upload switches to a multipart upload for large bodies. Either way
+        # the object only appears once complete, a failed multipart upload is aborted.
+        self._s3_client.upload_fileobj(
+            io.BytesIO(body), self._bucket_name, dst_path, Config=self._transfer_config
         )
+        _record_write(dst_path)
+
+    def copy_files(
+        self,
+        files: list[tuple[Union[Path, str], Union[Path, str]]],
+        max_workers: int = 8,
+    ) -> None:
+        super().copy_files(files, max_workers=self._max_pool_connections)
+
+    def write_dataframes(
+        self,
+        dataframes: list[tuple[DataFrame, Union[Path, str]]],
+        max_workers: int = 8,
+    ) -> None:
+        super().write_dataframes(dataframes, max_workers=self._max_pool_connections)
+
+
+class CachingFileStorage(FileStorage):
+    # Keeps recently written and read dataframes and JSON data in memory and still
+    # writes everything through to the wrapped storage. A cached entry is only used
+    # while the file's fingerprint is unchanged, so outside changes are picked up.
+    # Note that a dataframe written and read back is served as it was written,
+    # without the round trip through CSV, e.g. without its declared dtypes. Runs
+    # that stop between stages read different frames, so it is off by default.
+
+    def __init__(self, storage: FileStorage, max_bytes: int) -> None:
+        self._storage = storage
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def ensure_directory(self, path: Union[Path, str]) -> None:
+        self._storage.ensure_directory(path)
+
+    def exists(self, path: Union[Path, str]) -> bool:
+        return self._storage.exists(path)
+
+    def list_files(self, path: Union[Path, str]) -> list[Path]:
+        return self._storage.list_files(path)
+
+    def fingerprint(self, path: Union[Path, str]) -> Optional[str]:
+        return self._storage.fingerprint(path)
+
+    def write_dataframe(self, dataframe: DataFrame, path: Union[Path, str]) -> None:
+        self._storage.write_dataframe(dataframe, path)
+        self._put(path, dataframe.copy(), _dataframe_size(dataframe))
+
+    def read_dataframe(
+        self,
+        path: Union[Path, str],
+        columns: Optional[Columns] = None,
+        engine: str = "c",
+    ) -> DataFrame:
+        cached = self._get(path)
+        # A cached projection can only serve reads of a subset of its columns
+        if cached is not None and (
+            cached.complete
+            or (columns is not None and set(columns) <= set(cached.value.columns))
+        ):
+            log.info(f"Read dataframe from {path} (cached)")
+            if columns is None:
+                return cached.value.copy()
+            return _project(cached.value, columns)
+
+        dataframe = self._storage.read_dataframe(path, columns, engine)
+        if cached is None:
+            self._put(
+                path,
+                dataframe.copy(),
+                _dataframe_size(dataframe),
+                complete=columns is None,
+            )
+
+        return dataframe
+
+    def read_json(self, path: Union[Path, str]) -> Any:
+        cached = self._get(path)
+        if cached is not None:
+            log.info(f"Read JSON data from {path} (cached)")
+            return copy.deepcopy(cached.value)
+
+        data = self._storage.read_json(path)
+        self._put(path, copy.deepcopy(data), _json_size(data))
+
+        return data
+
+    def open_stream(self, path: Union[Path, str]) -> ContextManager[BinaryIO]:
+        return self._storage.open_stream(path)
+
+    def write_json(self, data: Any, path: Union[Path, str]):
+        self._storage.write_json(data, path)
+        self._put(path, copy.deepcopy(data), _json_size(data))
+
+    def write_bytes(self, data: bytes, path: Union[Path, str]) -> None:
+        self._invalidate(path)
+        self._storage.write_bytes(data, path)
+
+    def read_excel(self, path: Union[Path, str], sheet: str) -> DataFrame:
+        return self._storage.read_excel(path, sheet)
+
+    def write_pickle(self, object: Any, path: Union[Path, str]) -> None:
+        self._invalidate(path)
+        self._storage.write_pickle(object, path)
+
+    def read_pickle(self, path: Union[Path, str]) -> Any:
+        return self._storage.read_pickle(path)
+
+    def write_array(self, array: np.ndarray, path: Union[Path, str]) -> None:
+        self._invalidate(path)
+        self._storage.write_array(array, path)
+
+    def read_array(self, path: Union[Path, str], mmap: bool = False) -> np.ndarray:
+        return self._storage.read_array(path, mmap)
+
+    def copy_file(
+        self,
+        src_path: Union[Path, str],
+        dst_path: Union[Path, str],
+    ) -> None:
+        self._invalidate(dst_path)
+        self._storage.copy_file(src_path, dst_path)
+
+    def copy_files(
+        self,
+        files: list[tuple[Union[Path, str], Union[Path, str]]],
+        max_workers: int = 8,
+    ) -> None:
+        for _, dst_path in files:
+            self._invalidate(dst_path)
+        self._storage.copy_files(files, max_workers)
+
+    def _get(self, path: Union[Path, str]) -> Optional["_CacheEntry"]:
+        key = _cache_key(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.fingerprint is None or entry.fingerprint != self._storage.fingerprint(
+            path
+        ):
+            self._invalidate(path)
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+        return entry
+
+    def _put(
+        self, path: Union[Path, str], value: Any, size: int, complete: bool = True
+    ) -> None:
+        self._invalidate(path)
+        if size > self._max_bytes:
+            return
+
+        fingerprint = self._storage.fingerprint(path)
+        key = _cache_key(path)
+
+        with self._lock:
+            self._entries[key] = _CacheEntry(value, fingerprint, size, complete)
+            self._size += size
+
+            # Evict the least recently used entries until the budget is met
+            while self._size > self._max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                log.info(f"Evicted {evicted_key} from storage cache")
+
+    def _invalidate(self, path: Union[Path, str]) -> None:
+        with self._lock:
+            entry = self._entries.pop(_cache_key(path), None)
+            if entry is not None:
+                self._size -= entry.size
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    fingerprint: Optional[str]
+    size: int
+    # False if only some of the columns of a dataframe were read
+    complete: bool
+
+
+@contextlib.contextmanager
+def record_writes() -> Iterator[set[str]]:
+    # Collects the paths of all files written in the meantime by any storage,
+    # including writes from worker threads started with config.in_current_context.
+    # Writes of other runs in the same process aren't collected.
+    written: set[str] = set()
+    token = _recorded_writes.set((*_recorded_writes.get(), written))
+
+    try:
+        yield written
+    finally:
+        _recorded_writes.reset(token)
+
+
+def _record_write(path: Union[Path, str]) -> None:
+    with _registry_lock:
+        for written in _recorded_writes.get():
+            written.add(_cache_key(path))
+
+
+@contextlib.contextmanager
+def _atomic_write(path: Union[Path, str]) -> Iterator[Path]:
+    # Writes go to a temporary file next to the destination, which replaces it only
+    # once complete. A crash mid-write never leaves a truncated file behind.
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.tmp{path.suffix}")
+
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    _record_write(path)
+
+
+def _read_csv_projection(columns: Optional[Columns]) -> dict[str, Any]:
+    # Columns that aren't selected are never parsed
+    if columns is None:
+        return {}
+
+    return {
+        "usecols": list(columns),
+        "dtype": {column: dtype for column, dtype in columns.items() if dtype},
+    }
+
+
+def _read_csv_engine(engine: str) -> dict[str, Any]:
+    # The pyarrow engine parses on all cores and returns Arrow-backed dtypes for
+    # the columns without a declared dtype
+    if engine == "c":
+        return {}
+    if engine != "pyarrow":
+        raise ValueError(
+            f"{engine} is not a supported CSV engine. Use 'c' or 'pyarrow'."
+        )
+
+    if not pyarrow_available():
+        return {}
+
+    return {"engine": "pyarrow", "dtype_backend": "pyarrow"}
+
+
+@functools.cache
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        log.warning(f"pyarrow can't be imported, using the C CSV engine instead: {e}")
+        return False
+
+    return True
+
+
+def _project(dataframe: DataFrame, columns: Columns) -> DataFrame:
+    return dataframe[list(columns)].astype(
+        {column: dtype for column, dtype in columns.items() if dtype}
+    )
+
+
+def _cache_key(path: Union[Path, str]) -> str:
+    return Path(path).as_posix()
+
+
+def _dataframe_size(dataframe: DataFrame) -> int:
+    return int(dataframe.memory_usage(deep=True).sum())
+
+
+def _json_size(data: Any) -> int:
+    return len(json.dumps(data))
 
 
 def _s3_path(path: Union[Path, str]) -> str:
@@ -205,15 +783,57 @@ def _s3_path(path: Union[Path, str]) -> str:
         return path.as_posix()
 
 
+def _get_s3_client(max_pool_connections: int):
+    with _registry_lock:
+        if max_pool_connections not in _s3_clients:
+            _s3_clients[max_pool_connections] = boto3.client(
+                "s3",
+                config=Config(
+                    max_pool_connections=max_pool_connections,
+                    retries={"mode": "standard", "max_attempts": 5},
+                    tcp_keepalive=True,
+                ),
+            )
+
+        return _s3_clients[max_pool_connections]
+
+
 def get_storage() -> FileStorage:
     mode = config.get_file_access_setting("Mode")
 
+    # Runs of several configurations in one process share storages with the same settings
+    cache = (
+        config.get_file_access_setting("CacheEnabled"),
+        config.get_file_access_setting("CacheMaxBytes"),
+    )
     if mode == "Local":
-        return LocalFileStorage()
-    if mode == "S3":
-        bucket_name = config.get_file_access_setting("S3Bucket")
-        return S3Storage(bucket_name)
+        key = (mode, *cache)
+    elif mode == "S3":
+        key = (mode, config.get_file_access_setting("S3Bucket"), *cache)
     else:
         raise ValueError(
             f"{mode} is not a supported file access mode setting. Use 'Local' or 'S3'."
         )
+
+    with _registry_lock:
+        if key not in _storages:
+            storage = _create_storage(mode)
+
+            if config.get_file_access_setting("CacheEnabled") == "True":
+                max_bytes = int(config.get_file_access_setting("CacheMaxBytes"))
+                storage = CachingFileStorage(storage, max_bytes)
+
+            _storages[key] = storage
+
+        return _storages[key]
+
+
+def _create_storage(mode: str) -> FileStorage:
+    if mode == "S3":
+        bucket_name = config.get_file_access_setting("S3Bucket")
+        max_pool_connections = int(
+            config.get_file_access_setting("S3MaxPoolConnections")
+        )
+        return S3Storage(bucket_name, max_pool_connections)
+    else:
+        return LocalFileStorage()
@@ -1,8 +1,10 @@
+import os
 import pytest
 import pandas as pd
 from unittest.mock import patch, Mock
+from botocore.exceptions import ClientError
 
-from .file_storage import LocalFileStorage
+from .file_storage import CachingFileStorage, LocalFileStorage, S3Storage
 
 
 base_path = "C:/foo"
@@ -42,3 +44,170 @@ def test_local_file_storage_write_dataframe(makedirs_mock: Mock, to_csv_mock: Mo
 
     to_csv_mock.assert_called_once()
     to_csv_mock.assert_called_once_with(df)
+
+
+def test_caching_file_storage_serves_written_dataframe(tmp_path):
+    storage = CachingFileStorage(LocalFileStorage(), max_bytes=2**20)
+    df = pd.DataFrame(test_data)
+    path = tmp_path / "bar.csv"
+
+    storage.write_dataframe(df, path)
+
+    with patch.object(LocalFileStorage, "read_dataframe") as read_dataframe_mock:
+        result = storage.read_dataframe(path)
+
+    read_dataframe_mock.assert_not_called()
+    pd.testing.assert_frame_equal(result, df)
+    assert result is not df
+
+
+def test_caching_file_storage_rereads_changed_file(tmp_path):
+    storage = CachingFileStorage(LocalFileStorage(), max_bytes=2**20)
+    path = tmp_path / "bar.csv"
+    storage.write_dataframe(pd.DataFrame(test_data), path)
+
+    pd.DataFrame({"Name": ["Eve"]}).to_csv(path, index=False)
+
+    result = storage.read_dataframe(path)
+
+    assert result["Name"].tolist() == ["Eve"]
+
+
+def test_caching_file_storage_evicts_least_recently_used(tmp_path):
+    df = pd.DataFrame(test_data)
+    df_size = int(df.memory_usage(deep=True).sum())
+    storage = CachingFileStorage(LocalFileStorage(), max_bytes=2 * df_size)
+
+    for name in ["a.csv", "b.csv"]:
+        storage.write_dataframe(df, tmp_path / name)
+    storage.read_dataframe(tmp_path / "a.csv")
+    storage.write_dataframe(df, tmp_path / "c.csv")
+
+    with patch.object(
+        LocalFileStorage, "read_dataframe", return_value=df
+    ) as read_dataframe_mock:
+        storage.read_dataframe(tmp_path / "a.csv")
+        storage.read_dataframe(tmp_path / "b.csv")
+
+    read_dataframe_mock.assert_called_once_with(tmp_path / "b.csv", None, "c")
+
+
+def test_caching_file_storage_projects_cached_dataframe(tmp_path):
+    storage = CachingFileStorage(LocalFileStorage(), max_bytes=2**20)
+    path = tmp_path / "bar.csv"
+    storage.write_dataframe(pd.DataFrame(test_data), path)
+
+    result = storage.read_dataframe(path, {"Name": "string", "Age": "float64"})
+
+    assert list(result.columns) == ["Name", "Age"]
+    assert str(result["Name"].dtype) == "string"
+    assert str(result["Age"].dtype) == "float64"
+
+
+def test_local_file_storage_reads_same_values_with_pyarrow_engine(tmp_path):
+    # Falls back to the C engine if pyarrow isn't available
+    path = tmp_path / "bar.csv"
+    pd.DataFrame(test_data).to_csv(path, index=False)
+    columns = {"Name": "string", "Age": "int64", "Salary": "float64"}
+
+    result = LocalFileStorage().read_dataframe(path, columns, engine="pyarrow")
+
+    expected = LocalFileStorage().read_dataframe(path, columns, engine="c")
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_local_file_storage_keeps_previous_file_if_write_fails(tmp_path):
+    path = tmp_path / "bar.csv"
+    storage = LocalFileStorage()
+    storage.write_dataframe(pd.DataFrame(test_data), path)
+
+    with patch("pandas.DataFrame.to_csv", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            storage.write_dataframe(pd.DataFrame(), path)
+
+    assert storage.list_files(tmp_path) == [path]
+    assert storage.read_dataframe(path)["Name"].tolist() == test_data["Name"]
+
+
+def test_local_file_storage_skips_copy_of_unchanged_file(tmp_path):
+    src = tmp_path / "src.csv"
+    dst = tmp_path / "dst.csv"
+    src.write_text("a,b\n1,2\n")
+    storage = LocalFileStorage()
+    storage.copy_file(src, dst)
+
+    with patch("shutil.copy2") as copy2_mock:
+        storage.copy_file(src, dst)
+
+    copy2_mock.assert_not_called()
+    assert dst.read_text() == "a,b\n1,2\n"
+
+
+def test_local_file_storage_copies_changed_file_again(tmp_path):
+    src = tmp_path / "src.csv"
+    dst = tmp_path / "dst.csv"
+    src.write_text("a,b\n1,2\n")
+    storage = LocalFileStorage()
+    storage.copy_file(src, dst)
+
+    # Same size, only the modification time tells the new content apart
+    src.write_text("a,b\n3,4\n")
+    dst_stat = dst.stat()
+    os.utime(src, ns=(dst_stat.st_atime_ns, dst_stat.st_mtime_ns + 10**9))
+    storage.copy_file(src, dst)
+
+    assert dst.read_text() == "a,b\n3,4\n"
+
+
+def _s3_storage(heads: dict) -> S3Storage:
+    # heads holds the head_object response of every existing key
+    def head_object(Bucket, Key):
+        if Key not in heads:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return heads[Key]
+
+    client = Mock()
+    client.head_object.side_effect = head_object
+    with patch(
+        "dp_plain_python.environment.file_storage._get_s3_client", return_value=client
+    ):
+        return S3Storage("bucket")
+
+
+@pytest.mark.parametrize(
+    "dst_head",
+    [
+        {"ContentLength": 10, "ETag": '"abc"'},
+        {"ContentLength": 10, "ETag": '"xyz"', "Metadata": {"source-etag": '"abc"'}},
+    ],
+)
+def test_s3_storage_skips_copy_of_unchanged_object(dst_head):
+    storage = _s3_storage(
+        {"src.csv": {"ContentLength": 10, "ETag": '"abc"'}, "dst.csv": dst_head}
+    )
+
+    storage.copy_file("src.csv", "dst.csv")
+
+    storage._s3_client.copy.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "dst_head",
+    [
+        None,
+        {"ContentLength": 12, "ETag": '"xyz"', "Metadata": {"source-etag": '"abc"'}},
+        {"ContentLength": 10, "ETag": '"xyz"', "Metadata": {"source-etag": '"old"'}},
+    ],
+)
+def test_s3_storage_copies_changed_object_again(dst_head):
+    heads = {"src.csv": {"ContentLength": 10, "ETag": '"abc"'}}
+    if dst_head is not None:
+        heads["dst.csv"] = dst_head
+    storage = _s3_storage(heads)
+
+    storage.copy_file("src.csv", "dst.csv")
+
+    storage._s3_client.copy.assert_called_once()
+    args, kwargs = storage._s3_client.copy.call_args
+    assert args[:3] == ({"Bucket": "bucket", "Key": "src.csv"}, "bucket", "dst.csv")
+    assert kwargs["ExtraArgs"]["Metadata"] == {"source-etag": '"abc"'}
@@ -0,0 +1,155 @@
+import contextlib
+import cProfile
+import functools
+import io
+import logging
+import marshal
+import pstats
+import sys
+import threading
+from contextvars import ContextVar
+from typing import Callable, Iterator, NamedTuple, Optional, TypeVar
+from dp_plain_python.environment import config, file_storage
+
+log = logging.getLogger(__name__)
+
+_Function = TypeVar("_Function", bound=Callable)
+
+
+class _Settings(NamedTuple):
+    profile_steps: bool
+    # Directory of the run's profiles within the Profiles location, if any
+    subdirectory: Optional[str]
+
+
+# Profiling is off unless enabled for the run. The settings belong to the context,
+# so runs of several configurations in one process are profiled on their own.
+_settings: ContextVar[Optional[_Settings]] = ContextVar(
+    "profiling_settings", default=None
+)
+
+# Profiles of the stage and step currently running in each thread, innermost last
+_local = threading.local()
+
+# Since Python 3.12 cProfile can only profile one thread of a process at a time,
+# stages of parallel runs that are profiled then take turns
+_exclusive = threading.Lock() if sys.version_info >= (3, 12) else None
+
+
+class _Profile:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.profiler = cProfile.Profile()
+        # Step profiles are part of the stage profile as well
+        self.nested: list[cProfile.Profile] = []
+        self.completed: list[tuple[str, pstats.Stats]] = []
+
+
+def enable(profile_steps: bool = False, subdirectory: Optional[str] = None) -> None:
+    # Enables profiling in the current context, see config.use_config
+    _settings.set(_Settings(profile_steps, subdirectory))
+
+
+@contextlib.contextmanager
+def profile(name: str) -> Iterator[None]:
+    # Only one profiler can be active at a time, so a nested profile pauses the
+    # one around it. The profiles are written once the outermost one completes,
+    # which keeps them out of the files the stage wrote.
+    # Note that only the calling thread is profiled, not worker threads or processes.
+    if _settings.get() is None:
+        yield
+        return
+
+    active = _get_active()
+    outer = active[-1] if active else None
+    exclusive = _exclusive if outer is None and _exclusive else contextlib.nullcontext()
+    with exclusive, _profile(name, active, outer):
+        yield
+
+
+@contextlib.contextmanager
+def _profile(
+    name: str, active: list[_Profile], outer: Optional[_Profile]
+) -> Iterator[None]:
+    if outer is not None:
+        outer.profiler.disable()
+        name = f"{outer.name}.{name}"
+
+    current = _Profile(name)
+    active.append(current)
+    current.profiler.enable()
+    try:
+        yield
+    finally:
+        current.profiler.disable()
+        active.pop()
+
+        stats = pstats.Stats(current.profiler)
+        for nested in current.nested:
+            stats.add(nested)
+        completed = [*current.completed, (name, stats)]
+
+        if outer is None:
+            _write_profiles(completed)
+        else:
+            outer.nested.append(current.profiler)
+            outer.completed.extend(completed)
+            outer.profiler.enable()
+
+
+def step(function: _Function) -> _Function:
+    # Profiles a step of a stage on its own if step profiling is enabled. Steps only
+    # run profiled within a stage profile of the same thread, so steps that run in
+    # worker threads, e.g. while scoring chunks, aren't profiled.
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        settings = _settings.get()
+        if settings is None or not settings.profile_steps or not _get_active():
+            return function(*args, **kwargs)
+
+        with profile(function.__name__.lstrip("_")):
+            return function(*args, **kwargs)
+
+    return wrapper  # type: ignore
+
+
+def _get_active() -> list[_Profile]:
+    if not hasattr(_local, "active"):
+        _local.active = []
+
+    return _local.active
+
+
+def _write_profiles(profiles: list[tuple[str, pstats.Stats]]) -> None:
+    profiles_path = config.get_location("Profiles")
+    subdirectory = _settings.get().subdirectory  # type: ignore
+    if subdirectory is not None:
+        profiles_path = profiles_path / subdirectory
+    top = int(config.get_profiling_setting("Top"))
+    storage = file_storage.get_storage()
+
+    storage.ensure_directory(profiles_path)
+    for name, stats in profiles:
+        log.info(f"Storing profile of {name} to {profiles_path}")
+
+        # The same format as pstats.Stats.dump_stats, to be opened with pstats or snakeviz
+        storage.write_bytes(marshal.dumps(stats.stats), profiles_path / f"{name}.prof")  # type: ignore
+        storage.write_bytes(
+            _summarize(name, stats, top).encode("utf-8"),
+            profiles_path / f"{name}.txt",
+        )
+
+
+def _summarize(name: str, stats: pstats.Stats, top: int) -> str:
+    summary = io.StringIO()
+    summary.write(f"Profile of {name}\n\n")
+
+    for sort, title in [
+        ("tottime", "time spent in the function itself"),
+        ("cumulative", "time including the functions called"),
+    ]:
+        summary.write(f"Top {top} functions by {title}:\n")
+        stats.stream = summary  # type: ignore
+        stats.sort_stats(sort).print_stats(top)
+
+    return summary.getvalue()
@@ -0,0 +1,114 @@
+import pstats
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+import pytest
+
+from dp_plain_python.environment.file_storage import LocalFileStorage
+from . import config, file_storage, profiling
+
+
+@pytest.fixture
+def profiles_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        profiling, "_settings", ContextVar("profiling_settings", default=None)
+    )
+    monkeypatch.setattr(file_storage, "get_storage", LocalFileStorage)
+    monkeypatch.setattr(config, "get_location", lambda location: tmp_path)
+    monkeypatch.setattr(config, "get_profiling_setting", lambda setting: "5")
+    return tmp_path
+
+
+@profiling.step
+def _clean_dataset():
+    return sorted(range(1000), key=lambda i: -i)
+
+
+def test_profile_writes_stage_and_step_profiles(profiles_path):
+    profiling.enable(profile_steps=True)
+
+    with profiling.profile("transform"):
+        _clean_dataset()
+
+    assert sorted(path.name for path in profiles_path.iterdir()) == [
+        "transform.clean_dataset.prof",
+        "transform.clean_dataset.txt",
+        "transform.prof",
+        "transform.txt",
+    ]
+    # The step is part of the stage profile as well
+    stats = pstats.Stats(str(profiles_path / "transform.prof"))
+    assert any(function == "_clean_dataset" for _, _, function in stats.stats)  # type: ignore
+    assert "Top 5 functions" in (profiles_path / "transform.txt").read_text()
+
+
+def test_profile_does_nothing_when_disabled(profiles_path):
+    with profiling.profile("transform"):
+        _clean_dataset()
+
+    assert list(profiles_path.iterdir()) == []
+
+
+def test_steps_in_worker_threads_are_not_profiled(profiles_path):
+    profiling.enable(profile_steps=True)
+    workers = 4
+    running = threading.Barrier(workers)
+
+    # All workers are within the step at the same time
+    @profiling.step
+    def _score_chunk():
+        running.wait(timeout=5)
+
+    with profiling.profile("scoring"):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda _: _score_chunk(), range(workers)))
+        _clean_dataset()
+
+    assert sorted(path.name for path in profiles_path.iterdir()) == [
+        "scoring.clean_dataset.prof",
+        "scoring.clean_dataset.txt",
+        "scoring.prof",
+        "scoring.txt",
+    ]
+
+
+def test_step_outside_of_a_stage_is_not_profiled(profiles_path):
+    profiling.enable(profile_steps=True)
+
+    _clean_dataset()
+
+    assert list(profiles_path.iterdir()) == []
+
+
+def test_runs_in_their_own_context_are_profiled_on_their_own(profiles_path):
+    def run(subdirectory, profile_steps):
+        if subdirectory is not None:
+            profiling.enable(profile_steps=profile_steps, subdirectory=subdirectory)
+        with profiling.profile("transform"):
+            _clean_dataset()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(contextvars.Context().run, run, subdirectory, steps)
+            for subdirectory, steps in [
+                ("base", False),
+                ("walking", True),
+                (None, True),
+            ]
+        ]
+        for future in futures:
+            future.result()
+
+    assert sorted(
+        path.relative_to(profiles_path).as_posix()
+        for path in profiles_path.rglob("*")
+        if path.is_file()
+    ) == [
+        "base/transform.prof",
+        "base/transform.txt",
+        "walking/transform.clean_dataset.prof",
+        "walking/transform.clean_dataset.txt",
+        "walking/transform.prof",
+        "walking/transform.txt",
+    ]
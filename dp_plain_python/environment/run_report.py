@@ -0,0 +1,52 @@
+import contextvars
+import logging
+from datetime import datetime
+from typing import Any
+from dp_plain_python.environment import config, file_storage
+
+log = logging.getLogger(__name__)
+
+run_report_filename = "run_report.json"
+
+# Summary of a pipeline run, stages add their own sections to it.
+# Runs of several configurations in one process each have their own.
+_report: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar("report")
+
+
+def start_run() -> None:
+    _report.set({"started": datetime.now().isoformat(), "stages": {}})
+
+
+def add_section(name: str, data: Any) -> None:
+    get_report()[name] = data
+
+
+def add_stage_timing(stage: str, seconds: float) -> None:
+    get_report().setdefault("stages", {})[stage] = {
+        "duration_seconds": round(seconds, 3)
+    }
+
+
+def add_skipped_stage(stage: str) -> None:
+    get_report().setdefault("stages", {})[stage] = {"skipped": True}
+
+
+def get_report() -> dict[str, Any]:
+    report = _report.get(None)
+    if report is None:
+        report = {}
+        _report.set(report)
+
+    return report
+
+
+def write_report() -> None:
+    report = get_report()
+    report["completed"] = datetime.now().isoformat()
+
+    analytics_path = config.get_location("Analytics")
+    storage = file_storage.get_storage()
+
+    log.info(f"Storing {run_report_filename} to analytics")
+    storage.ensure_directory(analytics_path)
+    storage.write_json(report, analytics_path / run_report_filename)
@@ -0,0 +1,49 @@
+import contextlib
+import threading
+from typing import Any, Callable, Hashable, Iterator, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+# Runs of several configurations in one process share what only depends on the data
+# they read, e.g. the cleaned reference datasets and the spatial indices over them.
+# Outside of sharing nothing is kept, a single run creates everything once anyway.
+_entries: Optional[dict[Hashable, Any]] = None
+_key_locks: dict[Hashable, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def sharing() -> Iterator[None]:
+    global _entries
+    with _lock:
+        _entries = {}
+
+    try:
+        yield
+    finally:
+        with _lock:
+            _entries = None
+            _key_locks.clear()
+
+
+def is_sharing() -> bool:
+    # Keys that are expensive to compute are only worth it while sharing
+    return _entries is not None
+
+
+def get_or_create(key: Hashable, create: Callable[[], _T]) -> _T:
+    # Entries are shared as they are, callers must not modify them
+    with _lock:
+        entries = _entries
+        if entries is not None:
+            key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    if entries is None:
+        return create()
+
+    # Runs asking for an entry that is being created wait for it instead of
+    # creating it again. If creating fails, the next one tries again.
+    with key_lock:
+        if key not in entries:
+            entries[key] = create()
+        return entries[key]
@@ -0,0 +1,30 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import shared_cache
+
+
+def test_get_or_create_creates_once_while_sharing():
+    created = []
+    started = threading.Barrier(4)
+
+    def create():
+        created.append(threading.get_ident())
+        return object()
+
+    def get(_):
+        started.wait()
+        return shared_cache.get_or_create("key", create)
+
+    with shared_cache.sharing(), ThreadPoolExecutor(max_workers=4) as executor:
+        entries = list(executor.map(get, range(4)))
+
+    assert len(created) == 1
+    assert all(entry is entries[0] for entry in entries)
+
+
+def test_get_or_create_keeps_nothing_without_sharing():
+    first = shared_cache.get_or_create("key", object)
+    second = shared_cache.get_or_create("key", object)
+
+    assert first is not second
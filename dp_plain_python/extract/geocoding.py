@@ -0,0 +1,109 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+# The geocoding endpoint takes a batch of addresses as JSON:
+#   POST {"addresses": [{"block": "406", "street_name": "ANG MO KIO AVE 10"}, ...]}
+# and answers with one result per address it could resolve:
+#   {"results": [{"block": ..., "street_name": ..., "latitude": ..., "longitude": ...,
+#                 "postal_code": ..., "confidence": ..., "type": ...}, ...]}
+geocoded_columns = [
+    "block",
+    "street_name",
+    "latitude",
+    "longitude",
+    "postal_code",
+    "confidence",
+    "type",
+]
+
+_retry_status_codes = {429, 500, 502, 503, 504}
+
+
+def geocode_addresses(
+    addresses: list[dict[str, str]],
+    endpoint: str,
+    batch_size: int,
+    max_concurrency: int,
+    max_retries: int,
+    retry_backoff: float = 1.0,
+    on_batch: Optional[Callable[[list[dict[str, str]], list[dict]], None]] = None,
+) -> list[dict]:
+    # on_batch gets every batch with its results as soon as it completes, in the
+    # calling thread. If a batch fails, the other batches still complete and are
+    # handed over before the error is raised, so what resolved can be kept.
+    batches = [
+        addresses[i : i + batch_size] for i in range(0, len(addresses), batch_size)
+    ]
+    log.info(
+        f"Geocoding {len(addresses)} addresses in {len(batches)} batches "
+        f"({endpoint}, concurrency: {max_concurrency})"
+    )
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def geocode_batch(batch: list[dict[str, str]]) -> list[dict]:
+        return _post_batch(session, endpoint, batch, max_retries, retry_backoff)
+
+    results: list[dict] = []
+    error: Optional[Exception] = None
+    with session, ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {executor.submit(geocode_batch, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            try:
+                batch_results = future.result()
+            except Exception as batch_error:
+                error = error or batch_error
+                continue
+
+            results.extend(batch_results)
+            if on_batch is not None:
+                on_batch(futures[future], batch_results)
+
+    if error is not None:
+        raise error
+
+    log.info(f"Geocoding resolved {len(results)} out of {len(addresses)} addresses")
+
+    return results
+
+
+def _post_batch(
+    session: requests.Session,
+    endpoint: str,
+    batch: list[dict[str, str]],
+    max_retries: int,
+    retry_backoff: float,
+) -> list[dict]:
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.post(endpoint, json={"addresses": batch}, timeout=60)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            if attempt == max_retries:
+                raise
+            log.warning(f"Geocoding request failed ({error}), retrying")
+        else:
+            if response.status_code == 200:
+                return response.json()["results"]
+            if (
+                response.status_code not in _retry_status_codes
+                or attempt == max_retries
+            ):
+                error_msg = f"Geocoding API returned {response.status_code} status code: {response.text}"
+                log.exception(error_msg)
+                raise requests.HTTPError(error_msg)
+            log.warning(
+                f"Geocoding API returned {response.status_code} status code, retrying"
+            )
+
+        time.sleep(retry_backoff * 2**attempt)
+
+    return []
@@ -0,0 +1,40 @@
+import logging
+import uuid
+from datetime import datetime
+import pandas as pd
+from dp_plain_python.environment import config, file_storage
+from dp_plain_python.extract.geocoding import geocoded_columns
+
+log = logging.getLogger(__name__)
+
+
+def read_cache() -> pd.DataFrame:
+    # The cache is append-only: every geocoding run adds a new segment file
+    # and existing segments are never rewritten
+    storage = file_storage.get_storage()
+    segments = storage.list_files(config.get_location("GeocodingCache"))
+    log.info(f"Reading {len(segments)} geocoding cache segments")
+
+    if not segments:
+        return pd.DataFrame(columns=geocoded_columns)
+
+    return pd.concat(
+        [storage.read_dataframe(segment)[geocoded_columns] for segment in segments],
+        ignore_index=True,
+    )
+
+
+def append_to_cache(df_geocoded: pd.DataFrame) -> None:
+    storage = file_storage.get_storage()
+    geocoding_cache_path = config.get_location("GeocodingCache")
+
+    storage.ensure_directory(geocoding_cache_path)
+
+    # Batches of one run are appended quickly one after the other
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    segment_name = f"geocoded_{timestamp}_{uuid.uuid4().hex[:8]}.csv"
+    log.info(f"Appending {len(df_geocoded)} addresses to geocoding cache")
+
+    storage.write_dataframe(
+        df_geocoded[geocoded_columns], geocoding_cache_path / segment_name
+    )
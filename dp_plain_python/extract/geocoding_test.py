@@ -0,0 +1,132 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+
+from .geocoding import geocode_addresses
+
+
+class StubGeocodingHandler(BaseHTTPRequestHandler):
+    requests_seen = 0
+    fail_first_requests = 0
+
+    def do_POST(self):
+        handler = type(self)
+        handler.requests_seen += 1
+
+        if handler.requests_seen <= handler.fail_first_requests:
+            self._respond(503, {"error": "busy"})
+            return
+
+        length = int(self.headers["Content-Length"])
+        addresses = json.loads(self.rfile.read(length))["addresses"]
+        if any(address["street_name"] == "INVALID" for address in addresses):
+            self._respond(400, {"error": "invalid address"})
+            return
+
+        results = [
+            {
+                **address,
+                "latitude": 1.3,
+                "longitude": 103.8,
+                "postal_code": 560406,
+                "confidence": 1,
+                "type": "address",
+            }
+            for address in addresses
+            if address["street_name"] != "UNKNOWN"
+        ]
+        self._respond(200, {"results": results})
+
+    def _respond(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubGeocodingHandler.requests_seen = 0
+    StubGeocodingHandler.fail_first_requests = 0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeocodingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_port}/geocode"
+
+    server.shutdown()
+    server.server_close()
+
+
+addresses = [
+    {"block": "406", "street_name": "ANG MO KIO AVE 10"},
+    {"block": "108", "street_name": "ANG MO KIO AVE 4"},
+    {"block": "1", "street_name": "UNKNOWN"},
+]
+
+
+def test_geocode_addresses_in_batches(stub_server):
+    results = geocode_addresses(
+        addresses, stub_server, batch_size=2, max_concurrency=2, max_retries=0
+    )
+
+    assert StubGeocodingHandler.requests_seen == 2
+    assert sorted(result["block"] for result in results) == ["108", "406"]
+
+
+def test_geocode_addresses_retries_unavailable_endpoint(stub_server):
+    StubGeocodingHandler.fail_first_requests = 2
+
+    results = geocode_addresses(
+        addresses,
+        stub_server,
+        batch_size=10,
+        max_concurrency=1,
+        max_retries=2,
+        retry_backoff=0,
+    )
+
+    assert StubGeocodingHandler.requests_seen == 3
+    assert len(results) == 2
+
+
+def test_geocode_addresses_gives_up_after_max_retries(stub_server):
+    StubGeocodingHandler.fail_first_requests = 5
+
+    with pytest.raises(requests.HTTPError):
+        geocode_addresses(
+            addresses,
+            stub_server,
+            batch_size=10,
+            max_concurrency=1,
+            max_retries=1,
+            retry_backoff=0,
+        )
+
+
+def test_geocode_addresses_hands_over_completed_batches_before_failing(stub_server):
+    completed = []
+
+    with pytest.raises(requests.HTTPError):
+        geocode_addresses(
+            [{"block": "2", "street_name": "INVALID"}, *addresses],
+            stub_server,
+            batch_size=2,
+            max_concurrency=1,
+            max_retries=0,
+            on_batch=lambda batch, results: completed.append((batch, results)),
+        )
+
+    assert StubGeocodingHandler.requests_seen == 2
+    assert len(completed) == 1
+    batch, results = completed[0]
+    assert batch == addresses[1:]
+    assert [result["block"] for result in results] == ["108"]
@@ -1,12 +1,10 @@
 import logging
 import requests
 
-from dp_plain_python.environment import config
+from dp_plain_python.environment import config, shared_cache
 
 log = logging.getLogger(__name__)
 
-overpass_endpoint = config.get_api_endpoint("Overpass")
-
 shopping_mall_query = """
 [out:json];
 area["ISO3166-1"="SG"][admin_level=2]->.sg;
@@ -39,6 +37,16 @@ def get_mrt_stations_geodata():
 
 
 def _get(query):
+    # Runs of several configurations query the same endpoint once
+    overpass_endpoint = config.get_api_endpoint("Overpass")
+
+    return shared_cache.get_or_create(
+        ("overpass", overpass_endpoint, query),
+        lambda: _query(overpass_endpoint, query),
+    )
+
+
+def _query(overpass_endpoint, query):
     log.info(f"Querying overpass ({overpass_endpoint}). Query: {query}")
     response = requests.get(overpass_endpoint, params={"data": query})
 
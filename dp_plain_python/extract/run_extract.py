@@ -1,6 +1,9 @@
 import logging
-from dp_plain_python.environment import config, file_storage
+import pandas as pd
+from dp_plain_python.environment import config, file_storage, profiling
 
+from dp_plain_python.extract import geocoding_cache
+from dp_plain_python.extract.geocoding import geocode_addresses, geocoded_columns
 from dp_plain_python.extract.geolocation import (
     get_shopping_malls_geodata,
     get_mrt_stations_geodata,
@@ -8,63 +11,128 @@ from dp_plain_python.extract.geolocation import (
 
 log = logging.getLogger(__name__)
 
-resale_flat_prices_path = config.get_sourcefile_path("ResaleFlatPrices")
-mrt_stations_path = config.get_sourcefile_path("MrtStations")
-address_geodata_path = config.get_sourcefile_path("HdbAddressGeodata")
-
-staging_path = config.get_location("Staging")
-
-storage = file_storage.get_storage()
-
 
 def extract_into_staging() -> None:
     log.info(f"Starting Extraction Step.")
 
-    storage.ensure_directory(staging_path)
+    file_storage.get_storage().ensure_directory(config.get_location("Staging"))
 
-    _extract_resale_flat_prices()
-    _extract_mrt_stations()
+    _extract_source_files()
     _extract_mrt_geodata()
     _extract_mall_geodata()
-    _extract_address_geodata()
-
-
-def _extract_resale_flat_prices() -> None:
-    log.info("Extracting hdb resale flat prices data")
-
-    source = resale_flat_prices_path
-    destination = staging_path / resale_flat_prices_path.name
 
-    storage.copy_file(source, destination)
+    if config.get_geocoding_setting("Enabled") == "True":
+        _extract_missing_address_geodata()
 
 
-def _extract_mrt_stations() -> None:
-    log.info("Extracting MRT station data")
+@profiling.step
+def _extract_source_files() -> None:
+    log.info(
+        "Extracting hdb resale flat prices, MRT station and address geolocation data"
+    )
 
-    source = mrt_stations_path
-    destination = staging_path / mrt_stations_path.name
-
-    storage.copy_file(source, destination)
+    # The copies are independent, they run concurrently
+    file_storage.get_storage().copy_files(
+        [
+            (source, config.get_location("Staging") / source.name)
+            for source in [
+                config.get_sourcefile_path("ResaleFlatPrices"),
+                config.get_sourcefile_path("MrtStations"),
+                config.get_sourcefile_path("HdbAddressGeodata"),
+            ]
+        ]
+    )
 
 
+@profiling.step
 def _extract_mrt_geodata() -> None:
     log.info("Extracting MRT geodata")
     data = get_mrt_stations_geodata()
 
-    storage.write_json(data, staging_path / "mrt_geodata.json")
+    file_storage.get_storage().write_json(
+        data, config.get_location("Staging") / "mrt_geodata.json"
+    )
 
 
+@profiling.step
 def _extract_mall_geodata() -> None:
     log.info("Extracting Shopping Mall geodata")
     data = get_shopping_malls_geodata()
 
-    storage.write_json(data, staging_path / "mall_geodata.json")
-
-
-def _extract_address_geodata() -> None:
-    log.info("Extracting address geolocation data")
-
-    source = address_geodata_path
-    destination = staging_path / address_geodata_path.name
-
-    storage.copy_file(source, destination)
+    file_storage.get_storage().write_json(
+        data, config.get_location("Staging") / "mall_geodata.json"
+    )
+
+
+@profiling.step
+def _extract_missing_address_geodata() -> None:
+    log.info("Geocoding addresses missing from the address geolocation data")
+
+    storage = file_storage.get_storage()
+    staging_path = config.get_location("Staging")
+
+    address_columns = {"block": "string", "street_name": "string"}
+    df_resale_flat_prices = storage.read_dataframe(
+        staging_path / config.get_sourcefile_path("ResaleFlatPrices").name,
+        address_columns,
+    )
+    df_address_geodata = storage.read_dataframe(
+        staging_path / config.get_sourcefile_path("HdbAddressGeodata").name,
+        address_columns,
+    )
+    df_cached = geocoding_cache.read_cache()
+
+    df_missing = _get_missing_addresses(
+        df_resale_flat_prices, [df_address_geodata, df_cached]
+    )
+    log.info(f"Number of addresses without geolocation: {len(df_missing)}")
+
+    if df_missing.empty:
+        return
+
+    # Every completed batch goes to the cache right away, a batch that fails
+    # doesn't lose the others, the next run only sends what is still missing
+    geocode_addresses(
+        df_missing.to_dict(orient="records"),
+        endpoint=config.get_api_endpoint("Geocoding"),
+        batch_size=int(config.get_geocoding_setting("BatchSize")),
+        max_concurrency=int(config.get_geocoding_setting("MaxConcurrency")),
+        max_retries=int(config.get_geocoding_setting("MaxRetries")),
+        on_batch=_cache_geocoded_batch,
+    )
+
+
+def _cache_geocoded_batch(batch: list[dict[str, str]], results: list[dict]) -> None:
+    # Addresses the service couldn't resolve are cached without a location,
+    # so they aren't sent again on the next run
+    df_geocoded = pd.DataFrame(results, columns=geocoded_columns).astype(
+        {"block": str, "street_name": str}
+    )
+    df_geocoded = pd.merge(
+        pd.DataFrame(batch, columns=["block", "street_name"]),
+        df_geocoded,
+        how="left",
+        on=["block", "street_name"],
+    )
+
+    geocoding_cache.append_to_cache(df_geocoded)
+
+
+def _get_missing_addresses(
+    df_resale_flat_prices: pd.DataFrame, df_known: list[pd.DataFrame]
+) -> pd.DataFrame:
+    def address_keys(df: pd.DataFrame) -> pd.DataFrame:
+        return df[["block", "street_name"]].astype(str).drop_duplicates()
+
+    df_addresses = address_keys(df_resale_flat_prices)
+    df_known_addresses = pd.concat([address_keys(df) for df in df_known])
+
+    df_merged = pd.merge(
+        df_addresses,
+        df_known_addresses.drop_duplicates(),
+        how="left",
+        on=["block", "street_name"],
+        indicator=True,
+    )
+
+    return df_merged[df_merged["_merge"] == "left_only"][["block", "street_name"]]
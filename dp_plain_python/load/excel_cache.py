@@ -0,0 +1,28 @@
+import logging
+from pathlib import Path
+import pandas as pd
+from dp_plain_python.environment import config, file_storage
+
+log = logging.getLogger(__name__)
+
+
+def read_excel_cached(path: Path, sheet: str) -> pd.DataFrame:
+    # Parsing a workbook is slow even for tiny sheets, so every sheet is parsed once
+    # and kept as a pickled dataframe named after the workbook's content hash.
+    # A changed workbook has a different hash and is parsed again.
+    storage = file_storage.get_storage()
+    excel_cache_path = config.get_location("ExcelCache")
+    cached_path = (
+        excel_cache_path / f"{path.stem}_{sheet}_{storage.content_hash(path)}.pkl"
+    )
+
+    if storage.exists(cached_path):
+        log.info(f"Read excel data from {path} (sheet: {sheet}) via {cached_path}")
+        return storage.read_pickle(cached_path)
+
+    df = storage.read_excel(path, sheet)
+
+    storage.ensure_directory(excel_cache_path)
+    storage.write_pickle(df, cached_path)
+
+    return df
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from dp_plain_python.environment import config, file_storage
+from dp_plain_python.environment.file_storage import LocalFileStorage
+from . import excel_cache
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalFileStorage()
+    monkeypatch.setattr(file_storage, "get_storage", lambda: storage)
+    monkeypatch.setattr(config, "get_location", lambda _: tmp_path / "cache")
+    return storage
+
+
+def test_read_excel_cached_parses_workbook_once(tmp_path, storage):
+    path = tmp_path / "stations.xlsx"
+    df = pd.DataFrame({"Name": ["Bishan", "Yishun"], "Code": ["NS17", "NS13"]})
+    df.to_excel(path, sheet_name="Sheet1", index=False)
+
+    first = excel_cache.read_excel_cached(path, "Sheet1")
+    with patch.object(LocalFileStorage, "read_excel") as read_excel_mock:
+        second = excel_cache.read_excel_cached(path, "Sheet1")
+
+    read_excel_mock.assert_not_called()
+    pd.testing.assert_frame_equal(first, df)
+    pd.testing.assert_frame_equal(second, df)
+
+
+def test_read_excel_cached_parses_changed_workbook(tmp_path, storage):
+    path = tmp_path / "stations.xlsx"
+    pd.DataFrame({"Name": ["Bishan"]}).to_excel(path, sheet_name="Sheet1", index=False)
+    excel_cache.read_excel_cached(path, "Sheet1")
+
+    df = pd.DataFrame({"Name": ["Bishan", "Yishun"]})
+    df.to_excel(path, sheet_name="Sheet1", index=False)
+
+    pd.testing.assert_frame_equal(excel_cache.read_excel_cached(path, "Sheet1"), df)
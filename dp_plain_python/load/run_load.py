@@ -1,27 +1,34 @@
-import json
 from pathlib import Path
 import pandas as pd
 import logging
-from dp_plain_python.environment import config, file_storage
+from dp_plain_python.environment import config, file_storage, profiling
+from dp_plain_python.extract import geocoding_cache
+from dp_plain_python.load import excel_cache
+from dp_plain_python.utils.overpass_json import read_overpass_elements
+from dp_plain_python.utils.sampling import sample_rows
 
 log = logging.getLogger(__name__)
 
-staging_path = config.get_location("Staging")
-storage_path = config.get_location("Storage")
-
-resale_flat_prices_filename = config.get_sourcefile_path("ResaleFlatPrices").name
-mrt_stations_filename = config.get_sourcefile_path("MrtStations").name
 mrt_geodata_filename = "mrt_geodata.json"
 mall_geodata_filename = "mall_geodata.json"
-address_geodata_filename = config.get_sourcefile_path("HdbAddressGeodata").name
 
-storage = file_storage.get_storage()
+# The only Overpass fields the cleaners use, all other tags are never materialized.
+# Ways and relations have their location in center.lat/center.lon instead of lat/lon.
+overpass_fields = {
+    "type": "string",
+    "id": "int64",
+    "lat": "float64",
+    "lon": "float64",
+    "center.lat": "float64",
+    "center.lon": "float64",
+    "tags.name": "string",
+}
 
 
 def load_into_storage():
     log.info(f"Starting Loading Step.")
 
-    storage.ensure_directory(storage_path)
+    file_storage.get_storage().ensure_directory(config.get_location("Storage"))
 
     _load_resale_flat_prices()
     _load_mrt_stations()
@@ -30,65 +37,106 @@ def load_into_storage():
     _load_address_geodata()
 
 
+@profiling.step
 def _load_resale_flat_prices():
+    storage = file_storage.get_storage()
+    resale_flat_prices_filename = config.get_sourcefile_path("ResaleFlatPrices").name
     log.info(f"Loading {resale_flat_prices_filename} from staging into storage")
 
-    source = staging_path / resale_flat_prices_filename
+    source = config.get_location("Staging") / resale_flat_prices_filename
+
+    df = storage.read_dataframe(
+        source, engine=config.get_csv_engine("ResaleFlatPrices")
+    )
 
-    df = storage.read_dataframe(source)
+    # Everything downstream is derived from the resale flat prices,
+    # so a sample taken here carries through transform and analytics
+    if config.get_sampling_setting("Enabled") == "True":
+        df = _sample_resale_flat_prices(df)
 
     storage.write_dataframe(
-        df, storage_path / config.get_storage_filename("ResaleFlatPrices")
+        df,
+        config.get_location("Storage")
+        / config.get_storage_filename("ResaleFlatPrices"),
+    )
+
+
+def _sample_resale_flat_prices(df: pd.DataFrame) -> pd.DataFrame:
+    fraction = config.get_sampling_setting("Fraction")
+    max_rows = config.get_sampling_setting("MaxRows")
+    stratify_by = config.get_sampling_setting("StratifyBy")
+
+    df_sample = sample_rows(
+        df,
+        fraction=float(fraction) if fraction else None,
+        max_rows=int(max_rows) if max_rows else None,
+        seed=int(config.get_sampling_setting("Seed")),
+        stratify_by=[column.strip() for column in stratify_by.split(",") if column],
     )
+    log.info(f"Sampled {len(df_sample)} out of {len(df)} resale flat prices")
 
+    return df_sample
 
+
+@profiling.step
 def _load_mrt_stations():
+    mrt_stations_filename = config.get_sourcefile_path("MrtStations").name
     log.info(f"Loading {mrt_stations_filename} from staging into storage")
 
-    source = staging_path / mrt_stations_filename
-    df = storage.read_excel(source, "Sheet1")
+    source = config.get_location("Staging") / mrt_stations_filename
+    df = excel_cache.read_excel_cached(source, "Sheet1")
 
-    storage.write_dataframe(
-        df, storage_path / config.get_storage_filename("MrtStations")
+    file_storage.get_storage().write_dataframe(
+        df, config.get_location("Storage") / config.get_storage_filename("MrtStations")
     )
 
 
+@profiling.step
 def _load_mrt_geodata():
     log.info(f"Loading {mrt_geodata_filename} from staging into storage")
 
-    source = staging_path / mrt_geodata_filename
+    source = config.get_location("Staging") / mrt_geodata_filename
     df = _load_overpass_json_dataframe(source)
 
-    storage.write_dataframe(
-        df, storage_path / config.get_storage_filename("MrtGeodata")
+    file_storage.get_storage().write_dataframe(
+        df, config.get_location("Storage") / config.get_storage_filename("MrtGeodata")
     )
 
 
+@profiling.step
 def _load_mall_geodata():
     log.info(f"Loading {mall_geodata_filename} from staging into storage")
 
-    source = staging_path / mall_geodata_filename
+    source = config.get_location("Staging") / mall_geodata_filename
     df = _load_overpass_json_dataframe(source)
 
-    storage.write_dataframe(
-        df, storage_path / config.get_storage_filename("MallGeodata")
+    file_storage.get_storage().write_dataframe(
+        df, config.get_location("Storage") / config.get_storage_filename("MallGeodata")
     )
 
 
+@profiling.step
 def _load_address_geodata():
+    storage = file_storage.get_storage()
+    address_geodata_filename = config.get_sourcefile_path("HdbAddressGeodata").name
     log.info(f"Loading {address_geodata_filename} from staging into storage")
 
-    source = staging_path / address_geodata_filename
+    source = config.get_location("Staging") / address_geodata_filename
 
-    df = storage.read_dataframe(source)
+    df = storage.read_dataframe(
+        source, engine=config.get_csv_engine("HdbAddressGeodata")
+    )
+
+    if config.get_geocoding_setting("Enabled") == "True":
+        df = pd.concat([df, geocoding_cache.read_cache()], ignore_index=True)
 
     storage.write_dataframe(
-        df, storage_path / config.get_storage_filename("HdbAddressGeodata")
+        df,
+        config.get_location("Storage")
+        / config.get_storage_filename("HdbAddressGeodata"),
     )
 
 
-def _load_overpass_json_dataframe(source: Path):
-    data = storage.read_json(source)
-
-    data_dict = pd.json_normalize(data, record_path=["elements"])
-    return pd.DataFrame.from_dict(data_dict, orient="columns")  # type: ignore
+def _load_overpass_json_dataframe(source: Path) -> pd.DataFrame:
+    with file_storage.get_storage().open_stream(source) as stream:
+        return read_overpass_elements(stream, overpass_fields)
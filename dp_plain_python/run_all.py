@@ -1,11 +1,18 @@
+import argparse
 import logging
 import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
 
 from dp_plain_python.extract.run_extract import extract_into_staging
 from dp_plain_python.load.run_load import load_into_storage
 from dp_plain_python.transform.run_analytics_transform import transform_for_analytics
 from dp_plain_python.analytics.run_analytics import run_analytics
-from dp_plain_python.environment import config
+from dp_plain_python.analytics.run_evaluation import run_evaluation
+from dp_plain_python.analytics.run_scoring import run_scoring
+from dp_plain_python.analytics.run_aggregation import run_aggregation
+from dp_plain_python.environment import checkpoints, config, profiling, run_report
 
 if config.get_logging_setting("Enabled") != "True":
     logging.disable()
@@ -19,21 +26,143 @@ logging.basicConfig(
 
 log = logging.getLogger(__name__)
 
+# In pipeline order, with the setting that enables each stage
+stages = [
+    ("extract", "ExtractEnabled", extract_into_staging),
+    ("load", "LoadEnabled", load_into_storage),
+    ("transform_analytics", "TransformAnalyticsEnabled", transform_for_analytics),
+    ("analytics", "AnalyticsEnabled", run_analytics),
+    ("evaluation", "EvaluationEnabled", run_evaluation),
+    ("scoring", "ScoringEnabled", run_scoring),
+    ("aggregation", "AggregationEnabled", run_aggregation),
+]
 
-def main():
+
+def get_stage_inputs() -> dict[str, list[Path]]:
+    # Files from outside the pipeline a stage depends on, a changed input means the
+    # stage has to run again even if it completed before
+    return {
+        "extract": [
+            config.get_sourcefile_path("ResaleFlatPrices"),
+            config.get_sourcefile_path("MrtStations"),
+            config.get_sourcefile_path("HdbAddressGeodata"),
+        ],
+        "transform_analytics": (
+            [config.get_sourcefile_path("WalkingNetwork")]
+            if config.get_walking_network_setting("Enabled") == "True"
+            else []
+        ),
+        "scoring": [
+            Path(source) for source in [config.get_scoring_setting("Source")] if source
+        ],
+    }
+
+
+def get_stage_settings() -> dict[str, dict[str, Any]]:
+    # Settings a stage's output depends on, changed settings mean the stage has to
+    # run again. Later stages run again anyway once an earlier one does.
+    sections: dict[str, list[Any]] = {
+        "extract": ["SOURCEFILE_PATHS", "API_ENDPOINTS", "GEOCODING"],
+        "load": ["SAMPLING", "STORAGE_FILENAMES", "CSV_ENGINES"],
+        "transform_analytics": [
+            "STORAGE_FILENAMES",
+            "CSV_ENGINES",
+            "WALKING_NETWORK",
+            "MARKET_FEATURES",
+        ],
+        "analytics": ["ANALYTICS"],
+        "evaluation": ["ANALYTICS"],
+        "scoring": ["SCORING", "WALKING_NETWORK", "MARKET_FEATURES"],
+        "aggregation": ["STORAGE_FILENAMES", "AGGREGATION"],
+    }
+
+    return {
+        stage: {section: config.get_section(section) for section in stage_sections}
+        for stage, stage_sections in sections.items()
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    args = _parse_args(argv)
+
+    enable_profiling(args.profile, args.profile_steps)
+    run_pipeline()
+
+
+def enable_profiling(
+    profile: bool = False,
+    profile_steps: bool = False,
+    subdirectory: Optional[str] = None,
+) -> None:
+    # Profiles the run of the current configuration if asked for or enabled in it
+    if profile or profile_steps or config.get_profiling_setting("Enabled") == "True":
+        profiling.enable(
+            profile_steps=profile_steps
+            or config.get_profiling_setting("Steps") == "True",
+            subdirectory=subdirectory,
+        )
+
+
+def run_pipeline() -> None:
+    # Runs the enabled stages with the current configuration, see config.use_config
     log.info(f"Data Pipeline started.")
+    run_report.start_run()
 
-    if config.get_pipeline_setting("ExtractEnabled") == "True":
-        extract_into_staging()
-    if config.get_pipeline_setting("LoadEnabled") == "True":
-        load_into_storage()
-    if config.get_pipeline_setting("TransformAnalyticsEnabled") == "True":
-        transform_for_analytics()
-    if config.get_pipeline_setting("AnalyticsEnabled") == "True":
-        run_analytics()
+    resume = config.get_pipeline_setting("ResumeEnabled") == "True"
+    stage_inputs = get_stage_inputs()
+    stage_settings = get_stage_settings()
+
+    for index, (name, setting, stage) in enumerate(stages):
+        if config.get_pipeline_setting(setting) != "True":
+            continue
+
+        inputs, settings = stage_inputs.get(name), stage_settings.get(name)
+        if resume and checkpoints.is_complete(name, inputs, settings):
+            log.info(f"Skipping {name}, it completed in a previous run")
+            run_report.add_skipped_stage(name)
+            continue
+
+        # Once a stage runs, all stages after it work on new data
+        resume = False
+        for later_name, _, _ in stages[index + 1 :]:
+            checkpoints.invalidate(later_name)
+
+        _run_stage(name, stage, inputs, settings)
+
+    run_report.write_report()
 
     log.info(f"Data Pipeline completed.")
 
 
+def _parse_args(argv: Optional[list[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the data pipeline.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile every stage, overrides PROFILING.Enabled",
+    )
+    parser.add_argument(
+        "--profile-steps",
+        action="store_true",
+        help="Profile the steps of every stage as well, implies --profile",
+    )
+    args = parser.parse_args(argv)
+    args.profile = args.profile or args.profile_steps
+
+    return args
+
+
+def _run_stage(
+    name: str,
+    stage,
+    inputs: Optional[list[Path]],
+    settings: Optional[dict[str, Any]],
+) -> None:
+    start = time.perf_counter()
+    with profiling.profile(name):
+        checkpoints.run_step(name, stage, inputs, settings)
+    run_report.add_stage_timing(name, time.perf_counter() - start)
+
+
 if __name__ == "__main__":
     main()
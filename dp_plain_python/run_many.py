@@ -0,0 +1,107 @@
+import argparse
+import contextvars
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from dp_plain_python import run_all
+from dp_plain_python.environment import config, shared_cache
+
+log = logging.getLogger(__name__)
+
+# The config file of the run a log record comes from
+_run_name: contextvars.ContextVar[str] = contextvars.ContextVar("run_name", default="-")
+
+
+class _RunNameFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_name = _run_name.get()
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the data pipeline for several configurations at once."
+    )
+    parser.add_argument("configs", type=Path, nargs="+", help="Config files to run")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of configurations run at the same time, all of them by default",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile every stage of every run, overrides PROFILING.Enabled",
+    )
+    parser.add_argument(
+        "--profile-steps",
+        action="store_true",
+        help="Profile the steps of every stage as well, implies --profile",
+    )
+    args = parser.parse_args()
+
+    # Tells the runs apart in the interleaved log
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(_RunNameFilter())
+        handler.setFormatter(
+            logging.Formatter("%(levelname)s %(asctime)s [%(run_name)s] - %(message)s")
+        )
+
+    failed = run_many(
+        args.configs,
+        args.jobs or len(args.configs),
+        profile=args.profile,
+        profile_steps=args.profile_steps,
+    )
+    if failed:
+        log.error(f"{len(failed)} of {len(args.configs)} runs failed: {failed}")
+        sys.exit(1)
+
+    log.info(f"All {len(args.configs)} runs completed.")
+
+
+def run_many(
+    config_paths: list[Path],
+    jobs: int,
+    profile: bool = False,
+    profile_steps: bool = False,
+) -> list[Path]:
+    # The runs share a process, so the reference datasets and spatial indices that
+    # only depend on the input files are built once and shared among them.
+    # Every run is profiled as it would be on its own, to a directory of its own
+    # within its Profiles location. Returns the config files whose run failed.
+    for path in config_paths:
+        if not path.is_file():
+            raise FileNotFoundError(f"Config file {path} not found")
+
+    with shared_cache.sharing(), ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Every run starts from an empty context, with nothing left over from
+        # an earlier run in the same worker thread
+        futures = [
+            executor.submit(
+                contextvars.Context().run, _run_config, path, profile, profile_steps
+            )
+            for path in config_paths
+        ]
+        results = [future.result() for future in futures]
+
+    return [path for path, completed in zip(config_paths, results) if not completed]
+
+
+def _run_config(path: Path, profile: bool, profile_steps: bool) -> bool:
+    _run_name.set(path.name)
+    try:
+        with config.use_config(path):
+            run_all.enable_profiling(profile, profile_steps, subdirectory=path.stem)
+            run_all.run_pipeline()
+    except Exception:
+        log.exception(f"Run of {path} failed")
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    main()
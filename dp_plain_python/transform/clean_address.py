@@ -1,7 +1,21 @@
 import pandas as pd
+from dp_plain_python.environment import profiling
+from dp_plain_python.environment.file_storage import Columns
 from dp_plain_python.utils.select_columns import select_columns
 
+# The columns of the address geodata this cleaner reads
+address_geodata_columns: Columns = {
+    "block": "string",
+    "street_name": "string",
+    "latitude": "float64",
+    "longitude": "float64",
+    "postal_code": None,
+    "confidence": "float64",
+    "type": None,
+}
 
+
+@profiling.step
 def get_cleaned_addresses_with_geolocation(
     df_address_geodata: pd.DataFrame,
 ) -> pd.DataFrame:
@@ -1,8 +1,20 @@
 import pandas as pd
 from dp_plain_python.utils.coalesce_columns import coalesce_colums
+from dp_plain_python.environment import profiling
+from dp_plain_python.environment.file_storage import Columns
 from dp_plain_python.utils.select_columns import select_columns
 
+# The columns of the mall geodata this cleaner reads
+mall_geodata_columns: Columns = {
+    "tags.name": "string",
+    "lat": "float64",
+    "lon": "float64",
+    "center.lat": "float64",
+    "center.lon": "float64",
+}
 
+
+@profiling.step
 def get_cleaned_malls_with_geolocation(df_mall_geodata: pd.DataFrame) -> pd.DataFrame:
     # Depending on the type of element, the lat/long are in different columns
     df_mall_geodata = coalesce_colums(
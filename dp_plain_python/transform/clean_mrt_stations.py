@@ -1,7 +1,18 @@
 import pandas as pd
+from dp_plain_python.environment import profiling
+from dp_plain_python.environment.file_storage import Columns
 from dp_plain_python.utils.select_columns import select_columns
 
+# The columns of the MRT station list and geodata this cleaner reads
+mrt_stations_columns: Columns = {"Name": "string", "Code": "string", "Opening": None}
+mrt_geodata_columns: Columns = {
+    "tags.name": "string",
+    "lat": "float64",
+    "lon": "float64",
+}
 
+
+@profiling.step
 def get_cleaned_mrt_stations_with_geolocation(
     df_mrt_stations: pd.DataFrame, df_mrt_geodata: pd.DataFrame
 ) -> pd.DataFrame:
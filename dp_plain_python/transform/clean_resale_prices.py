@@ -1,17 +1,38 @@
 import pandas as pd
 from datetime import datetime
+from dp_plain_python.environment import profiling
+from dp_plain_python.environment.file_storage import Columns
 from dp_plain_python.utils.select_columns import select_columns
 
-
+# The columns of the resale flat prices this cleaner reads
+resale_flat_prices_columns: Columns = {
+    "month": "string",
+    "town": "string",
+    "flat_type": "string",
+    "block": "string",
+    "street_name": "string",
+    "storey_range": "string",
+    "floor_area_sqm": "float64",
+    "flat_model": "string",
+    "lease_commence_date": "int64",
+    "remaining_lease": "string",
+    "resale_price": "float64",
+}
+
+
+@profiling.step
 def get_cleaned_resale_prices(df_resale_flat_prices: pd.DataFrame) -> pd.DataFrame:
     df_resale_flat_prices = _get_remaining_lease_in_months(df_resale_flat_prices)
     df_resale_flat_prices = _get_storey_median(df_resale_flat_prices)
     df_resale_flat_prices = _get_rooms(df_resale_flat_prices)
+    df_resale_flat_prices["month"] = normalize_months(df_resale_flat_prices["month"])
 
     return select_columns(
         df_resale_flat_prices,
         {
+            "month": "month",
             "town": "town",
+            "flat_type": "flat_type",
             "block": "block",
             "street_name": "street_name",
             "storey_median": "storey_median",
@@ -72,6 +93,15 @@ def _calculate_remaining_lease(lease_commence_date: int, resale_date_str: str) -
     return (resale_year - lease_commence_date) * 12
 
 
+def normalize_months(months: pd.Series) -> pd.Series:
+    # The month of resale is given as e.g. "2017-01", older files use e.g. "01/01/2017".
+    # Both become "2017-01", so that months of different files can be compared.
+    parsed = pd.to_datetime(months, format="%Y-%m", errors="coerce")
+    parsed = parsed.fillna(pd.to_datetime(months, format="%d/%m/%Y", errors="coerce"))
+
+    return parsed.dt.strftime("%Y-%m").astype("string")
+
+
 def _get_storey_median(df_resale_flat_prices: pd.DataFrame) -> pd.DataFrame:
     df_resale_flat_prices["storey_median"] = df_resale_flat_prices[
         "storey_range"
@@ -90,13 +120,17 @@ def _calculate_median(storey_range: str) -> int:
 
 
 def _get_rooms(df_resale_flat_prices: pd.DataFrame) -> pd.DataFrame:
-    df_resale_flat_prices["room_no"] = df_resale_flat_prices["flat_type"].apply(
-        _parse_rooms
+    df_resale_flat_prices["room_no"] = get_room_numbers(
+        df_resale_flat_prices["flat_type"]
     )
 
     return df_resale_flat_prices
 
 
+def get_room_numbers(flat_types: pd.Series) -> pd.Series:
+    return flat_types.apply(_parse_rooms)
+
+
 def _parse_rooms(flat_type: str) -> int:
     # Flat time indicates number of rooms, e.g. "3 Room"
     # "Executive" flats have 5 rooms plus a study which we treat as an additional room
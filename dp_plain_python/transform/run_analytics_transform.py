@@ -1,57 +1,177 @@
+import hashlib
 import logging
+from typing import NamedTuple
 import pandas as pd
 from dp_plain_python.transform.clean_address import (
+    address_geodata_columns,
     get_cleaned_addresses_with_geolocation,
 )
-from dp_plain_python.transform.clean_malls import get_cleaned_malls_with_geolocation
+from dp_plain_python.transform.clean_malls import (
+    get_cleaned_malls_with_geolocation,
+    mall_geodata_columns,
+)
 from dp_plain_python.transform.clean_mrt_stations import (
     get_cleaned_mrt_stations_with_geolocation,
+    mrt_geodata_columns,
+    mrt_stations_columns,
+)
+from dp_plain_python.transform.clean_resale_prices import (
+    get_cleaned_resale_prices,
+    resale_flat_prices_columns,
+)
+from dp_plain_python.transform.walking_network import (
+    add_walking_distance_to_closest_mrt,
 )
-from dp_plain_python.transform.clean_resale_prices import get_cleaned_resale_prices
 
+import numpy as np
 from scipy.spatial import cKDTree
-from math import radians
 
-from dp_plain_python.environment import config, file_storage
+from dp_plain_python.environment import (
+    artifacts,
+    config,
+    file_storage,
+    profiling,
+    shared_cache,
+)
+from dp_plain_python.environment.file_storage import Columns
+from dp_plain_python.utils.feature_matrix import to_feature_matrix
+from dp_plain_python.utils.market_features import (
+    MARKET_FEATURE_COLUMNS,
+    MARKET_HISTORY_COLUMNS,
+    add_market_features,
+)
 
 
 log = logging.getLogger(__name__)
 
-storage_path = config.get_location("Storage")
-transformed_analytics_path = config.get_location("TransformedAnalytics")
+market_history_filename = "market_history.csv"
 
-resale_flat_prices_filename = config.get_storage_filename("ResaleFlatPrices")
-mrt_stations_filename = config.get_storage_filename("MrtStations")
-mrt_geodata_filename = config.get_storage_filename("MrtGeodata")
-mall_geodata_filename = config.get_storage_filename("MallGeodata")
-address_geodata_filename = config.get_storage_filename("HdbAddressGeodata")
+market_history_columns: Columns = {
+    "month": "string",
+    "town": "string",
+    "flat_type": "string",
+    "floor_area_sqm": "float64",
+    "resale_price": "float64",
+}
 
-storage = file_storage.get_storage()
+
+class ReferenceData(NamedTuple):
+    # The cleaned datasets every resale flat price is matched against
+    mrt_stations: pd.DataFrame
+    malls: pd.DataFrame
+    addresses: pd.DataFrame
 
 
 def transform_for_analytics() -> None:
     log.info("Starting Transformation Step for analytics")
 
-    storage.ensure_directory(transformed_analytics_path)
+    storage = file_storage.get_storage()
+    storage.ensure_directory(config.get_location("TransformedAnalytics"))
 
+    # Every cleaner declares the columns it needs, nothing else is parsed
     df_resale_flat_prices = storage.read_dataframe(
-        storage_path / resale_flat_prices_filename
+        config.get_location("Storage")
+        / config.get_storage_filename("ResaleFlatPrices"),
+        resale_flat_prices_columns,
+        config.get_csv_engine("ResaleFlatPrices"),
+    )
+
+    df_cleaned_resale_prices = get_cleaned_resale_prices(df_resale_flat_prices)
+    df_feature_set = build_feature_set(df_cleaned_resale_prices, read_reference_data())
+
+    _store_transformed_output(df_feature_set, "feature_set.csv")
+    if config.get_market_features_setting("Enabled") == "True":
+        # Scoring new transactions picks up their market from here
+        _store_transformed_output(
+            df_cleaned_resale_prices[MARKET_HISTORY_COLUMNS], market_history_filename
+        )
+    _publish_feature_matrix(df_feature_set)
+
+
+def read_reference_data() -> ReferenceData:
+    if not shared_cache.is_sharing():
+        return _read_reference_data()
+
+    # Runs of several configurations share the reference data read from the same
+    # files, whatever their location, as long as they read them with the same
+    # engines, which decide the dtypes
+    storage = file_storage.get_storage()
+    files = ["MrtStations", "MrtGeodata", "MallGeodata", "HdbAddressGeodata"]
+    key_paths = [
+        config.get_location("Storage") / config.get_storage_filename(file)
+        for file in files
+    ]
+    if config.get_walking_network_setting("Enabled") == "True":
+        key_paths.append(config.get_sourcefile_path("WalkingNetwork"))
+
+    return shared_cache.get_or_create(
+        (
+            "reference_data",
+            *(storage.content_hash(path) for path in key_paths),
+            *(config.get_csv_engine(file) for file in files),
+        ),
+        _read_reference_data,
+    )
+
+
+def _read_reference_data() -> ReferenceData:
+    storage = file_storage.get_storage()
+    storage_path = config.get_location("Storage")
+
+    df_mrt_stations = storage.read_dataframe(
+        storage_path / config.get_storage_filename("MrtStations"),
+        mrt_stations_columns,
+        config.get_csv_engine("MrtStations"),
+    )
+    df_mrt_geodata = storage.read_dataframe(
+        storage_path / config.get_storage_filename("MrtGeodata"),
+        mrt_geodata_columns,
+        config.get_csv_engine("MrtGeodata"),
+    )
+    df_mall_geodata = storage.read_dataframe(
+        storage_path / config.get_storage_filename("MallGeodata"),
+        mall_geodata_columns,
+        config.get_csv_engine("MallGeodata"),
+    )
+    df_address_geodata = storage.read_dataframe(
+        storage_path / config.get_storage_filename("HdbAddressGeodata"),
+        address_geodata_columns,
+        config.get_csv_engine("HdbAddressGeodata"),
     )
-    df_mrt_stations = storage.read_dataframe(storage_path / mrt_stations_filename)
-    df_mrt_geodata = storage.read_dataframe(storage_path / mrt_geodata_filename)
-    df_mall_geodata = storage.read_dataframe(storage_path / mall_geodata_filename)
-    df_address_geodata = storage.read_dataframe(storage_path / address_geodata_filename)
 
-    df_resale_flat_prices = get_cleaned_resale_prices(df_resale_flat_prices)
     df_mrt_stations = get_cleaned_mrt_stations_with_geolocation(
         df_mrt_stations, df_mrt_geodata
     )
-    df_mall_geodata = get_cleaned_malls_with_geolocation(df_mall_geodata)
-    df_address_geodata = get_cleaned_addresses_with_geolocation(df_address_geodata)
+    df_addresses = get_cleaned_addresses_with_geolocation(df_address_geodata)
+
+    # Every address gets its walking distance once, flats join it with the location
+    if config.get_walking_network_setting("Enabled") == "True":
+        df_addresses = add_walking_distance_to_closest_mrt(
+            df_addresses, df_mrt_stations
+        )
+
+    return ReferenceData(
+        mrt_stations=df_mrt_stations,
+        malls=get_cleaned_malls_with_geolocation(df_mall_geodata),
+        addresses=df_addresses,
+    )
+
+
+def build_feature_set(
+    df_resale_flat_prices: pd.DataFrame, reference_data: ReferenceData
+) -> pd.DataFrame:
+    # Turns cleaned resale flat prices into the feature set, the reference data
+    # isn't modified, so it can be shared by concurrent calls
+    # Before flats without location are dropped, they are part of the market too.
+    # Scoring adds them beforehand, over its whole source.
+    if config.get_market_features_setting("Enabled") == "True" and not set(
+        MARKET_FEATURE_COLUMNS
+    ).issubset(df_resale_flat_prices.columns):
+        df_resale_flat_prices = _add_market_features(df_resale_flat_prices)
 
     df_feature_set = pd.merge(
         df_resale_flat_prices,
-        df_address_geodata,
+        reference_data.addresses,
         how="left",
         on=["block", "street_name"],
     )
@@ -62,13 +182,28 @@ def transform_for_analytics() -> None:
     )
     df_feature_set = df_feature_set.dropna(subset=["latitude"])
 
-    df_feature_set = _add_closest_mrt(df_feature_set, df_mrt_stations)
-    df_feature_set = _add_closest_mall(df_feature_set, df_mall_geodata)
+    df_feature_set = _add_closest_mrt(df_feature_set, reference_data.mrt_stations)
+    df_feature_set = _add_closest_mall(df_feature_set, reference_data.malls)
     df_feature_set = _add_distance_to_cbd(df_feature_set)
 
-    _store_transformed_output(df_feature_set, "feature_set.csv")
+    return df_feature_set
+
+
+def read_market_history() -> pd.DataFrame:
+    return file_storage.get_storage().read_dataframe(
+        config.get_location("TransformedAnalytics") / market_history_filename,
+        market_history_columns,
+    )
+
+
+@profiling.step
+def _add_market_features(df_resale_flat_prices: pd.DataFrame) -> pd.DataFrame:
+    return add_market_features(
+        df_resale_flat_prices, int(config.get_market_features_setting("WindowMonths"))
+    )
 
 
+@profiling.step
 def _add_closest_mrt(df_feature_set, df_mrt_stations):
     df_feature_set = _find_closest_location(
         df_feature_set, df_mrt_stations, "closest_mrt"
@@ -76,6 +211,7 @@ def _add_closest_mrt(df_feature_set, df_mrt_stations):
     return df_feature_set
 
 
+@profiling.step
 def _add_closest_mall(df_feature_set, df_mall_geodata):
     df_feature_set = _find_closest_location(
         df_feature_set, df_mall_geodata, "closest_mall"
@@ -84,6 +220,7 @@ def _add_closest_mall(df_feature_set, df_mall_geodata):
     return df_feature_set
 
 
+@profiling.step
 def _add_distance_to_cbd(df_feature_set):
     cbd_location = pd.DataFrame.from_dict(
         {
@@ -104,30 +241,48 @@ def _find_closest_location(
     EARTH_RADIUS = 6371
 
     # Convert latitude and longitude to radians
-    df_feature_set["latitude_rad"] = df_feature_set["latitude"].apply(radians)
-    df_feature_set["longitude_rad"] = df_feature_set["longitude"].apply(radians)
-    df_locations["latitude_rad"] = df_locations["latitude"].apply(radians)
-    df_locations["longitude_rad"] = df_locations["longitude"].apply(radians)
+    points = np.radians(df_feature_set[["latitude", "longitude"]].to_numpy(float))
+    locations = np.radians(df_locations[["latitude", "longitude"]].to_numpy(float))
 
-    # Create a KDTree for the location dataframe
-    location_tree = cKDTree(df_locations[["latitude_rad", "longitude_rad"]])
+    # Create a KDTree for the locations, runs of several configurations share it
+    location_tree = shared_cache.get_or_create(
+        ("location_tree", hashlib.sha256(locations.tobytes()).hexdigest()),
+        lambda: cKDTree(locations),
+    )
 
     # Query the KDTree for each point in the points dataframe
-    distances, indices = location_tree.query(
-        df_feature_set[["latitude_rad", "longitude_rad"]], k=1
-    )
+    distances, indices = location_tree.query(points, k=1)
 
     # Get the closest entry from the location dataframe
-    df_feature_set[f"{location_type}"] = df_locations.loc[indices, "name"].values  # type: ignore
+    df_feature_set[f"{location_type}"] = df_locations["name"].to_numpy()[indices]
     df_feature_set[f"distance_to_{location_type}"] = distances * EARTH_RADIUS * 1000
 
-    # Drop the intermediate columns
-    df_feature_set.drop(["latitude_rad", "longitude_rad"], axis=1, inplace=True)
-
     return df_feature_set
 
 
+@profiling.step
 def _store_transformed_output(df: pd.DataFrame, filename: str) -> None:
     log.info(f"Storing {filename} to transformed (analytics)")
 
-    storage.write_dataframe(df, transformed_analytics_path / filename)
+    file_storage.get_storage().write_dataframe(
+        df, config.get_location("TransformedAnalytics") / filename
+    )
+
+
+@profiling.step
+def _publish_feature_matrix(df_feature_set: pd.DataFrame) -> None:
+    feature_matrix = to_feature_matrix(df_feature_set)
+
+    # Analytics picks this up directly when it runs in the same process
+    artifacts.publish("feature_matrix", feature_matrix)
+
+    if config.get_analytics_setting("PersistFeatureMatrix") == "True":
+        log.info("Storing feature matrix to transformed (analytics)")
+        storage = file_storage.get_storage()
+        transformed_analytics_path = config.get_location("TransformedAnalytics")
+        storage.write_array(
+            feature_matrix.X, transformed_analytics_path / "feature_matrix_X.npy"
+        )
+        storage.write_array(
+            feature_matrix.y, transformed_analytics_path / "feature_matrix_y.npy"
+        )
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from dp_plain_python.environment import config, file_storage, profiling, shared_cache
+from dp_plain_python.utils.overpass_json import iter_json_array
+
+log = logging.getLogger(__name__)
+
+EARTH_RADIUS = 6371
+
+
+class WalkingNetwork(NamedTuple):
+    # Latitudes and longitudes of the nodes, in radians
+    nodes: np.ndarray
+    # Pairs of connected nodes, by position in nodes, and their length in meters
+    edges: np.ndarray
+    lengths: np.ndarray
+
+
+@profiling.step
+def add_walking_distance_to_closest_mrt(
+    df_addresses: pd.DataFrame, df_mrt_stations: pd.DataFrame
+) -> pd.DataFrame:
+    # Walking distance from every address to the closest station along the network.
+    # Addresses and stations are snapped to their closest node, the way to and from
+    # the node is counted as a straight line. Addresses without a location, e.g. that
+    # geocoding couldn't resolve, get no distance.
+    node_tree, distances = _read_node_distances(df_mrt_stations)
+
+    addresses = _to_radians(df_addresses)
+    located = np.isfinite(addresses).all(axis=1)
+    snap_distances, closest_nodes = node_tree.query(addresses[located], k=1)
+
+    walking_distances = np.full(len(df_addresses), np.nan)
+    walking_distances[located] = (
+        snap_distances * EARTH_RADIUS * 1000 + distances[closest_nodes]
+    )
+
+    df_addresses = df_addresses.copy()
+    df_addresses["walking_distance_to_closest_mrt"] = walking_distances
+
+    return df_addresses
+
+
+def _read_node_distances(
+    df_mrt_stations: pd.DataFrame,
+) -> tuple[cKDTree, np.ndarray]:
+    # The distance of every node to its closest station only changes with the network
+    # or the stations, so it is computed once per version of both
+    storage = file_storage.get_storage()
+    walking_network_path = config.get_sourcefile_path("WalkingNetwork")
+    network_cache_path = config.get_location("NetworkCache")
+
+    stations = _to_radians(df_mrt_stations)
+    cached_path = network_cache_path / (
+        f"{walking_network_path.stem}"
+        f"_{storage.content_hash(walking_network_path)[:16]}"
+        f"_{hashlib.sha256(stations.tobytes()).hexdigest()[:16]}.npy"
+    )
+
+    def read() -> tuple[cKDTree, np.ndarray]:
+        if storage.exists(cached_path):
+            log.info(f"Read walking distances to MRT stations from {cached_path}")
+            cached = storage.read_array(cached_path)
+        else:
+            network = read_walking_network()
+            distances = compute_node_distances(network, stations)
+
+            # Nodes that can't reach any station are left out, so nothing snaps to them
+            reachable = np.isfinite(distances)
+            cached = np.column_stack([network.nodes[reachable], distances[reachable]])
+
+            storage.ensure_directory(network_cache_path)
+            storage.write_array(cached, cached_path)
+
+        return cKDTree(cached[:, :2]), cached[:, 2]
+
+    # Runs of several configurations with the same network and stations share the
+    # distances and the tree over their nodes
+    return shared_cache.get_or_create(("walking_network", str(cached_path)), read)
+
+
+@profiling.step
+def read_walking_network() -> WalkingNetwork:
+    # The network is an Overpass extract of the walkable ways with their nodes,
+    # e.g. from the query `way[highway][highway!~"motorway|trunk"](area); (._;>;); out;`
+    walking_network_path = config.get_sourcefile_path("WalkingNetwork")
+    log.info(f"Read walking network from {walking_network_path}")
+
+    node_ids: list[int] = []
+    coordinates: list[tuple[float, float]] = []
+    way_starts: list[int] = []
+    way_ends: list[int] = []
+
+    with file_storage.get_storage().open_stream(walking_network_path) as stream:
+        for element in iter_json_array(stream, "elements"):
+            if element["type"] == "node":
+                node_ids.append(element["id"])
+                coordinates.append((element["lat"], element["lon"]))
+            elif element["type"] == "way":
+                way_nodes = element["nodes"]
+                way_starts.extend(way_nodes[:-1])
+                way_ends.extend(way_nodes[1:])
+
+    ids = np.array(node_ids, dtype=np.int64)
+    order = np.argsort(ids)
+    nodes = np.radians(np.array(coordinates, dtype=float).reshape(-1, 2))
+
+    # Node ids become positions, segments of ways without their nodes are left out
+    edges = np.column_stack(
+        [
+            _find_positions(ids, order, np.array(way_starts, dtype=np.int64)),
+            _find_positions(ids, order, np.array(way_ends, dtype=np.int64)),
+        ]
+    )
+    edges = edges[(edges >= 0).all(axis=1) & (edges[:, 0] != edges[:, 1])]
+
+    # Ways sharing a segment would add up their lengths in the sparse graph
+    edges = np.unique(np.sort(edges, axis=1), axis=0)
+
+    log.info(f"Walking network has {len(nodes)} nodes and {len(edges)} segments")
+
+    return WalkingNetwork(
+        nodes, edges, _haversine(nodes[edges[:, 0]], nodes[edges[:, 1]])
+    )
+
+
+def compute_node_distances(network: WalkingNetwork, stations: np.ndarray) -> np.ndarray:
+    # A single search from a virtual node connected to every station gives the
+    # distance of every node to its closest station, instead of one search per flat.
+    # The virtual node's edges are the ways from the stations to their closest node.
+    node_count = len(network.nodes)
+    snap_distances, station_nodes = cKDTree(network.nodes).query(stations, k=1)
+
+    # Stations sharing their closest node share its edge, the sparse graph would
+    # add up their lengths otherwise. Zero lengths would read as missing edges.
+    station_lengths = np.full(node_count, np.inf)
+    np.minimum.at(station_lengths, station_nodes, snap_distances * EARTH_RADIUS * 1000)
+    station_nodes = np.flatnonzero(np.isfinite(station_lengths))
+    station_lengths = np.maximum(station_lengths[station_nodes], 1e-6)
+
+    rows = np.concatenate(
+        [network.edges[:, 0], np.full(len(station_nodes), node_count)]
+    )
+    columns = np.concatenate([network.edges[:, 1], station_nodes])
+    lengths = np.concatenate([np.maximum(network.lengths, 1e-6), station_lengths])
+
+    graph = coo_matrix(
+        (lengths, (rows, columns)), shape=(node_count + 1, node_count + 1)
+    ).tocsr()
+    distances = dijkstra(graph, directed=False, indices=node_count)
+
+    return distances[:node_count]
+
+
+def _to_radians(df_locations: pd.DataFrame) -> np.ndarray:
+    return np.radians(df_locations[["latitude", "longitude"]].to_numpy(float))
+
+
+def _find_positions(
+    ids: np.ndarray, order: np.ndarray, wanted: np.ndarray
+) -> np.ndarray:
+    # Position of every wanted id in ids, -1 if it isn't there
+    positions = order[np.searchsorted(ids, wanted, sorter=order).clip(max=len(ids) - 1)]
+
+    return np.where(ids[positions] == wanted, positions, -1)
+
+
+def _haversine(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    latitude_delta = end[:, 0] - start[:, 0]
+    longitude_delta = end[:, 1] - start[:, 1]
+    a = (
+        np.sin(latitude_delta / 2) ** 2
+        + np.cos(start[:, 0]) * np.cos(end[:, 0]) * np.sin(longitude_delta / 2) ** 2
+    )
+
+    return 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS * 1000
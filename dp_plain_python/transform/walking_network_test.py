@@ -0,0 +1,89 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from dp_plain_python.environment import config, file_storage
+from dp_plain_python.environment.file_storage import LocalFileStorage
+from . import walking_network
+
+# A way going around a block: the straight line from the flat to the station
+# is 1 km, the walk along the way twice as far
+network = {
+    "elements": [
+        {"type": "node", "id": 11, "lat": 1.3, "lon": 103.8},
+        {"type": "node", "id": 12, "lat": 1.3 + 0.5 / 111.195, "lon": 103.8},
+        {"type": "node", "id": 13, "lat": 1.3 + 0.5 / 111.195, "lon": 103.809},
+        {"type": "node", "id": 14, "lat": 1.3, "lon": 103.809},
+        {"type": "way", "id": 1, "nodes": [11, 12, 13]},
+        {"type": "way", "id": 2, "nodes": [13, 14]},
+        # Overlaps the first way, the segment must only count once
+        {"type": "way", "id": 3, "nodes": [12, 11]},
+    ]
+}
+df_mrt_stations = pd.DataFrame(
+    {"name": ["Bishan", "Far"], "latitude": [1.3, 1.45], "longitude": [103.8, 103.8]}
+)
+df_addresses = pd.DataFrame({"block": ["1"], "latitude": [1.3], "longitude": [103.809]})
+
+
+@pytest.fixture
+def network_path(tmp_path, monkeypatch):
+    path = tmp_path / "walking_network.json"
+    path.write_text(json.dumps(network))
+    storage = LocalFileStorage()
+    monkeypatch.setattr(file_storage, "get_storage", lambda: storage)
+    monkeypatch.setattr(config, "get_sourcefile_path", lambda _: path)
+    monkeypatch.setattr(config, "get_location", lambda _: tmp_path / "cache")
+    return path
+
+
+def test_walking_distance_follows_the_network(network_path):
+    df = walking_network.add_walking_distance_to_closest_mrt(
+        df_addresses, df_mrt_stations
+    )
+
+    straight = 1.0008 * 1000
+    around = 2 * 0.5 * 1000 + straight
+    np.testing.assert_allclose(
+        df["walking_distance_to_closest_mrt"], [around], rtol=1e-3
+    )
+
+
+def test_walking_distance_skips_addresses_without_location(network_path):
+    df_unresolved = pd.DataFrame(
+        {"block": ["1", "2"], "latitude": [1.3, np.nan], "longitude": [103.809, np.nan]}
+    )
+
+    df = walking_network.add_walking_distance_to_closest_mrt(
+        df_unresolved, df_mrt_stations
+    )
+
+    distances = df["walking_distance_to_closest_mrt"]
+    assert np.isfinite(distances.iloc[0])
+    assert np.isnan(distances.iloc[1])
+
+
+def test_walking_distance_is_cached_per_network_version(network_path):
+    first = walking_network.add_walking_distance_to_closest_mrt(
+        df_addresses, df_mrt_stations
+    )
+    with patch.object(walking_network, "read_walking_network") as read_mock:
+        second = walking_network.add_walking_distance_to_closest_mrt(
+            df_addresses, df_mrt_stations
+        )
+    read_mock.assert_not_called()
+    pd.testing.assert_frame_equal(first, second)
+
+    # A shortcut through the block
+    changed = {
+        "elements": [*network["elements"], {"type": "way", "id": 4, "nodes": [11, 14]}]
+    }
+    network_path.write_text(json.dumps(changed))
+    third = walking_network.add_walking_distance_to_closest_mrt(
+        df_addresses, df_mrt_stations
+    )
+    assert third["walking_distance_to_closest_mrt"].iloc[0] == pytest.approx(
+        1000, rel=1e-2
+    )
@@ -0,0 +1,45 @@
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from dp_plain_python.environment import config
+from dp_plain_python.utils.market_features import MARKET_FEATURE_COLUMNS
+
+FEATURE_COLUMNS = [
+    "storey_median",
+    "floor_area_sqm",
+    "lease_commence_date",
+    "remaining_lease_in_months",
+    "distance_to_closest_mrt",
+    "distance_to_closest_mall",
+    "distance_to_cbd",
+]
+TARGET_COLUMN = "resale_price"
+
+
+def get_feature_columns() -> list[str]:
+    # Optional features are only there when enabled
+    columns = list(FEATURE_COLUMNS)
+    if config.get_walking_network_setting("Enabled") == "True":
+        columns.append("walking_distance_to_closest_mrt")
+    if config.get_market_features_setting("Enabled") == "True":
+        columns.extend(MARKET_FEATURE_COLUMNS)
+
+    return columns
+
+
+class FeatureMatrix(NamedTuple):
+    X: np.ndarray
+    y: np.ndarray
+
+
+def to_feature_matrix(df_feature_set: pd.DataFrame) -> FeatureMatrix:
+    # The random forest works on C-contiguous float32 features and float64 targets,
+    # building the arrays in exactly that layout means sklearn doesn't copy them again.
+    columns = get_feature_columns()
+    X = np.empty((len(df_feature_set), len(columns)), dtype=np.float32)
+    for i, column in enumerate(columns):
+        X[:, i] = df_feature_set[column].to_numpy()
+
+    y = np.ascontiguousarray(df_feature_set[TARGET_COLUMN].to_numpy(dtype=np.float64))
+
+    return FeatureMatrix(X, y)
@@ -0,0 +1,103 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+MARKET_FEATURE_COLUMNS = ["trailing_price_per_sqm", "trailing_transactions"]
+
+# The transactions a market is made of, and the columns market features need.
+# Markets are kept apart by flat type, not the number of rooms, which is the same
+# for executive and multi-generation flats.
+MARKET_COLUMNS = ["town", "flat_type"]
+MARKET_HISTORY_COLUMNS = ["month", *MARKET_COLUMNS, "floor_area_sqm", "resale_price"]
+
+
+def add_market_features(
+    df_resale_prices: pd.DataFrame,
+    window_months: int,
+    df_history: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    # Median price per sqm of the transactions in the same town of the same flat type
+    # during the window_months before the month of every transaction, and
+    # their number. Without transactions in the window, both are 0.
+    # New transactions appended to earlier ones pass those as df_history, only its
+    # months from the window before the first new transaction up to the last one
+    # are read. Transactions without a month don't count towards any market and
+    # get 0 for both.
+    months = _month_numbers(df_resale_prices["month"])
+    known_months = months[months >= 0]
+
+    df_sources = df_resale_prices[MARKET_HISTORY_COLUMNS]
+    if df_history is not None and len(known_months):
+        history_months = _month_numbers(df_history["month"])
+        df_sources = pd.concat(
+            [
+                df_history.loc[
+                    (history_months >= known_months.min() - window_months)
+                    & (history_months < known_months.max()),
+                    MARKET_HISTORY_COLUMNS,
+                ],
+                df_sources,
+            ],
+            ignore_index=True,
+        )
+    df_sources = df_sources[_month_numbers(df_sources["month"]) >= 0]
+
+    # Markets are numbered across sources and transactions, a key is a market's month
+    markets = pd.concat(
+        [df_sources[MARKET_COLUMNS], df_resale_prices[MARKET_COLUMNS]],
+        ignore_index=True,
+    )
+    market_codes = markets.groupby(MARKET_COLUMNS, sort=False).ngroup().to_numpy()
+    source_keys = _keys(
+        market_codes[: len(df_sources)], _month_numbers(df_sources["month"])
+    )
+    # No window key is negative, so transactions without a month match none
+    keys = np.where(months >= 0, _keys(market_codes[len(df_sources) :], months), -1)
+
+    # Every source counts towards the window_months months after its own, instead of
+    # filtering the sources of every transaction
+    offsets = np.arange(1, window_months + 1)
+    window_keys = (source_keys[:, None] + offsets).reshape(-1)
+    window_values = np.repeat(
+        (df_sources["resale_price"] / df_sources["floor_area_sqm"]).to_numpy(float),
+        window_months,
+    )
+    needed = np.isin(window_keys, keys)
+    window_keys, window_values = window_keys[needed], window_values[needed]
+
+    # Sorted by key and value, the median of a key is in the middle of its run
+    order = np.lexsort((window_values, window_keys))
+    window_keys, window_values = window_keys[order], window_values[order]
+    unique_keys, starts, counts = np.unique(
+        window_keys, return_index=True, return_counts=True
+    )
+    medians = (
+        window_values[starts + (counts - 1) // 2] + window_values[starts + counts // 2]
+    ) / 2
+
+    df_window = pd.DataFrame(
+        {"trailing_price_per_sqm": medians, "trailing_transactions": counts},
+        index=unique_keys,
+    ).reindex(keys, fill_value=0)
+
+    df_resale_prices = df_resale_prices.copy()
+    for column in MARKET_FEATURE_COLUMNS:
+        df_resale_prices[column] = df_window[column].to_numpy()
+
+    return df_resale_prices
+
+
+def _month_numbers(months: pd.Series) -> np.ndarray:
+    # Months as "2017-01" become consecutive numbers, missing months -1
+    known = months.notna().to_numpy()
+    numbers = np.full(len(months), -1, dtype=np.int64)
+    numbers[known] = (
+        months[known].str.slice(0, 4).astype(int) * 12
+        + months[known].str.slice(5, 7).astype(int)
+    ).to_numpy()
+
+    return numbers
+
+
+def _keys(market_codes: np.ndarray, months: np.ndarray) -> np.ndarray:
+    return market_codes.astype(np.int64) * 1_000_000 + months
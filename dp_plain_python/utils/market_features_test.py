@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from .market_features import add_market_features
+
+rng = np.random.default_rng(3)
+rows = 600
+df_resale_prices = pd.DataFrame(
+    {
+        "month": pd.Series(
+            [f"{year}-{month:02d}" for year in [2017, 2018] for month in range(1, 13)]
+        )
+        .sample(rows, replace=True, random_state=3)
+        .to_numpy(),
+        "town": rng.choice(["BEDOK", "BISHAN"], rows),
+        "flat_type": rng.choice(["4 ROOM", "EXECUTIVE", "MULTI-GENERATION"], rows),
+        "floor_area_sqm": rng.uniform(60, 120, rows).round(),
+        "resale_price": rng.uniform(200_000, 900_000, rows).round(-3),
+    }
+)
+
+
+def test_add_market_features_matches_filtering_every_transaction():
+    df = add_market_features(df_resale_prices, window_months=3)
+
+    period = pd.PeriodIndex(df_resale_prices["month"], freq="M")
+    price_per_sqm = (
+        df_resale_prices["resale_price"] / df_resale_prices["floor_area_sqm"]
+    )
+    for i in rng.choice(rows, 50, replace=False):
+        months_before = (period[i] - period).map(lambda offset: offset.n)
+        in_window = (
+            (df_resale_prices["town"] == df_resale_prices["town"][i])
+            & (df_resale_prices["flat_type"] == df_resale_prices["flat_type"][i])
+            & (months_before >= 1)
+            & (months_before <= 3)
+        )
+
+        assert df["trailing_transactions"][i] == in_window.sum()
+        expected = price_per_sqm[in_window].median() if in_window.any() else 0
+        assert np.isclose(df["trailing_price_per_sqm"][i], expected)
+
+
+def test_add_market_features_appends_to_history():
+    is_new = df_resale_prices["month"] >= "2018-07"
+
+    df_appended = add_market_features(
+        df_resale_prices[is_new], window_months=3, df_history=df_resale_prices[~is_new]
+    )
+
+    df_expected = add_market_features(df_resale_prices, window_months=3)[is_new]
+    pd.testing.assert_frame_equal(df_appended, df_expected)
+
+
+def test_add_market_features_reads_history_up_to_the_last_month():
+    # Earlier transactions of the same months as new ones count as well
+    is_history = (df_resale_prices["month"] < "2018-10") & (
+        df_resale_prices.index % 2 == 0
+    )
+
+    df_appended = add_market_features(
+        df_resale_prices[~is_history],
+        window_months=3,
+        df_history=df_resale_prices[is_history],
+    )
+
+    df_expected = add_market_features(df_resale_prices, window_months=3)[~is_history]
+    pd.testing.assert_frame_equal(df_appended, df_expected)
+
+
+def test_add_market_features_ignores_missing_months():
+    df_missing = df_resale_prices.copy()
+    df_missing["month"] = df_missing["month"].astype("string")
+    df_missing.loc[:9, "month"] = pd.NA
+
+    df = add_market_features(df_missing, window_months=3)
+
+    assert (df.loc[:9, "trailing_transactions"] == 0).all()
+    df_expected = add_market_features(df_resale_prices[10:], window_months=3)
+    pd.testing.assert_frame_equal(
+        df[10:], df_expected.assign(month=df_missing["month"][10:])
+    )
@@ -0,0 +1,141 @@
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator
+import pandas as pd
+
+_whitespace = " \t\n\r"
+
+
+def read_overpass_elements(
+    stream: BinaryIO, fields: dict[str, str], chunk_size: int = 1 << 20
+) -> pd.DataFrame:
+    # Only the declared fields are kept, e.g. {"tags.name": "string", "lat": "float64"}.
+    # Nested values are addressed with dots, missing values become NA.
+    paths = {field: field.split(".") for field in fields}
+    columns: dict[str, list[Any]] = {field: [] for field in fields}
+
+    for element in iter_json_array(stream, "elements", chunk_size):
+        for field, path in paths.items():
+            columns[field].append(_get_nested(element, path))
+
+    return pd.DataFrame(
+        {
+            field: pd.Series(values, dtype=fields[field])
+            for field, values in columns.items()
+        }
+    )
+
+
+def iter_json_array(
+    stream: BinaryIO, key: str, chunk_size: int = 1 << 20
+) -> Iterator[Any]:
+    # Yields the items of the array under `key` in the top-level JSON object one by one,
+    # reading the stream in chunks instead of loading the whole document
+    reader = _JsonStreamReader(stream, chunk_size)
+
+    reader.expect("{")
+    while True:
+        if reader.peek() == "}":
+            return
+
+        current_key = reader.decode_value()
+        reader.expect(":")
+
+        if current_key != key:
+            reader.decode_value()
+        else:
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+
+            while True:
+                yield reader.decode_value()
+
+                if reader.peek() == "]":
+                    return
+                reader.expect(",")
+
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
+
+
+def _get_nested(element: dict, path: list[str]) -> Any:
+    value: Any = element
+    for part in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+
+    return value
+
+
+class _JsonStreamReader:
+    def __init__(self, stream: BinaryIO, chunk_size: int) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def peek(self) -> str:
+        self._skip_whitespace()
+        return self._buffer[self._pos]
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise ValueError(
+                f"Expected '{token}' in JSON stream, found '{self._buffer[self._pos]}'"
+            )
+        self._pos += 1
+
+    def decode_value(self) -> Any:
+        self._skip_whitespace()
+
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value is cut off at the end of the buffer
+                if self._eof:
+                    raise
+                self._read_chunk()
+                continue
+
+            # A number cut off by the end of the buffer, e.g. "0." of "0.6",
+            # still decodes, so it only counts once the next delimiter is read
+            is_scalar = not isinstance(value, (dict, list, str))
+            if is_scalar and not self._eof and not self._is_delimited(end):
+                self._read_chunk()
+                continue
+
+            self._pos = end
+            return value
+
+    def _is_delimited(self, end: int) -> bool:
+        return end < len(self._buffer) and self._buffer[end] in _whitespace + ",]}"
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            while (
+                self._pos < len(self._buffer) and self._buffer[self._pos] in _whitespace
+            ):
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return
+            if self._eof:
+                raise ValueError("Unexpected end of JSON stream")
+            self._read_chunk()
+
+    def _read_chunk(self) -> None:
+        chunk = self._stream.read(self._chunk_size)
+        self._eof = not chunk
+
+        # Drop what has been consumed already, so the buffer stays about one chunk large
+        self._buffer = self._buffer[self._pos :] + self._text_decoder.decode(
+            chunk, final=self._eof
+        )
+        self._pos = 0
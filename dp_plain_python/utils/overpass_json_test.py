@@ -0,0 +1,64 @@
+import io
+import json
+import pytest
+
+from .overpass_json import iter_json_array, read_overpass_elements
+
+overpass_data = {
+    "version": 0.6,
+    "osm3s": {"copyright": "The data included in this document is from OSM."},
+    "elements": [
+        {
+            "type": "node",
+            "id": 1,
+            "lat": 1.3521,
+            "lon": 103.8198,
+            "tags": {"name": "Ang Mo Kio", "name:zh": "宏茂桥", "subway": "yes"},
+        },
+        {
+            "type": "way",
+            "id": 2,
+            "center": {"lat": 1.3, "lon": 103.9},
+            "nodes": [10, 11, 12],
+            "tags": {"name": "Mustafa Centre", "shop": "mall"},
+        },
+        {"type": "node", "id": 3, "lat": 1.31, "lon": 103.81, "tags": {"shop": "mall"}},
+    ],
+}
+
+fields = {
+    "id": "int64",
+    "lat": "float64",
+    "center.lat": "float64",
+    "tags.name": "string",
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_iter_json_array_matches_json_load(chunk_size):
+    stream = io.BytesIO(json.dumps(overpass_data, ensure_ascii=False).encode("utf-8"))
+
+    elements = list(iter_json_array(stream, "elements", chunk_size))
+
+    assert elements == overpass_data["elements"]
+
+
+def test_read_overpass_elements_selects_declared_fields():
+    stream = io.BytesIO(json.dumps(overpass_data, indent=2).encode("utf-8"))
+
+    df = read_overpass_elements(stream, fields, chunk_size=16)
+
+    assert list(df.columns) == list(fields)
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["tags.name"].isna().tolist() == [False, False, True]
+    assert df["center.lat"].isna().tolist() == [True, False, True]
+    assert str(df["tags.name"].dtype) == "string"
+
+
+def test_read_overpass_elements_without_elements():
+    stream = io.BytesIO(b'{"version": 0.6, "elements": []}')
+
+    df = read_overpass_elements(stream, fields)
+
+    assert df.empty
+    assert list(df.columns) == list(fields)
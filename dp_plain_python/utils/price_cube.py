@@ -0,0 +1,91 @@
+from typing import NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+# The dimensions of a cell, the finest level the cube aggregates prices at
+CUBE_DIMENSIONS = ["month", "town", "room_no", "flat_model"]
+
+
+class PriceCube(NamedTuple):
+    # Every row counts the flats of a cell within one price bin, and sums their prices
+    cells: pd.DataFrame
+    # Relative width of the price bins, e.g. 0.01 for bins 1% wider than the one before
+    bin_width: float
+
+
+def build_price_cube(df_resale_prices: pd.DataFrame, bin_width: float) -> pd.DataFrame:
+    # Means are exact, as the prices are summed. Medians are interpolated within
+    # their bin, so they are off by less than the bin width.
+    return (
+        df_resale_prices.assign(
+            bin=_price_bins(df_resale_prices["resale_price"].to_numpy(), bin_width)
+        )
+        .groupby([*CUBE_DIMENSIONS, "bin"], observed=True)["resale_price"]
+        .agg(count="size", price_sum="sum")
+        .reset_index()
+    )
+
+
+def query_price_cube(
+    price_cube: PriceCube,
+    filters: dict[str, Optional[list]],
+    month_from: Optional[str] = None,
+    month_to: Optional[str] = None,
+    group_by: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    # Count, mean and median price of the flats matching the filters, e.g.
+    # {"town": ["BEDOK"], "room_no": [4, 5]}, for every group or all of them
+    df_cells = price_cube.cells
+    group_by = group_by or []
+
+    mask = np.ones(len(df_cells), dtype=bool)
+    for column, values in filters.items():
+        if values:
+            mask &= df_cells[column].isin(values).to_numpy()
+    if month_from:
+        mask &= (df_cells["month"] >= month_from).to_numpy()
+    if month_to:
+        mask &= (df_cells["month"] <= month_to).to_numpy()
+
+    # Sorted by group and bin, so the bins of a group follow each other in price order
+    df_bins = (
+        df_cells[mask]
+        .groupby([*group_by, "bin"], observed=True)[["count", "price_sum"]]
+        .sum()
+        .reset_index()
+    )
+    group = (
+        df_bins.groupby(group_by, observed=True).ngroup().to_numpy()
+        if group_by
+        else np.zeros(len(df_bins), dtype=int)
+    )
+
+    count = df_bins["count"].to_numpy()
+    cumulative = df_bins.groupby(group)["count"].cumsum().to_numpy()
+    total = df_bins.groupby(group)["count"].transform("sum").to_numpy()
+    price_sum = df_bins.groupby(group)["price_sum"].transform("sum").to_numpy()
+
+    # The median is in the first bin of a group reaching half of its flats
+    reaches_half = cumulative >= total / 2
+    first = reaches_half & ~np.r_[False, reaches_half[:-1] & (group[1:] == group[:-1])]
+    count, cumulative, total = count[first], cumulative[first], total[first]
+    fraction = (total / 2 - (cumulative - count)) / count
+    median = (
+        _bin_start(df_bins["bin"].to_numpy()[first], price_cube.bin_width)
+        * (1 + price_cube.bin_width) ** fraction
+    )
+
+    df_aggregates = df_bins.loc[first, group_by].reset_index(drop=True)
+    df_aggregates["count"] = total
+    df_aggregates["mean_price"] = price_sum[first] / total
+    df_aggregates["median_price"] = median
+
+    return df_aggregates
+
+
+def _price_bins(prices: np.ndarray, bin_width: float) -> np.ndarray:
+    return np.floor(np.log(np.maximum(prices, 1)) / np.log1p(bin_width)).astype(int)
+
+
+def _bin_start(bins: np.ndarray, bin_width: float) -> np.ndarray:
+    return (1 + bin_width) ** bins.astype(float)
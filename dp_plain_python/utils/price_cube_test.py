@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from .price_cube import PriceCube, build_price_cube, query_price_cube
+
+rng = np.random.default_rng(7)
+rows = 2000
+df_resale_prices = pd.DataFrame(
+    {
+        "month": rng.choice(["2017-01", "2017-02", "2017-03"], rows),
+        "town": rng.choice(["BEDOK", "BISHAN", "YISHUN"], rows),
+        "room_no": rng.integers(2, 6, rows),
+        "flat_model": rng.choice(["Improved", "Model A"], rows),
+        "resale_price": rng.uniform(200_000, 900_000, rows).round(-3),
+    }
+)
+price_cube = PriceCube(build_price_cube(df_resale_prices, bin_width=0.01), 0.01)
+
+
+def test_query_price_cube_matches_aggregating_the_rows():
+    df_aggregates = query_price_cube(
+        price_cube,
+        {"town": ["BEDOK", "YISHUN"], "room_no": [3, 4]},
+        month_from="2017-02",
+        group_by=["town"],
+    )
+
+    df_expected = (
+        df_resale_prices[
+            df_resale_prices["town"].isin(["BEDOK", "YISHUN"])
+            & df_resale_prices["room_no"].isin([3, 4])
+            & (df_resale_prices["month"] >= "2017-02")
+        ]
+        .groupby("town")["resale_price"]
+        .agg(["size", "mean", "median"])
+    )
+    assert df_aggregates["town"].tolist() == ["BEDOK", "YISHUN"]
+    assert df_aggregates["count"].tolist() == df_expected["size"].tolist()
+    np.testing.assert_allclose(df_aggregates["mean_price"], df_expected["mean"])
+    # Medians are interpolated within bins 1% wide
+    np.testing.assert_allclose(
+        df_aggregates["median_price"], df_expected["median"], rtol=0.01
+    )
+
+
+def test_query_price_cube_without_groups_aggregates_all_flats():
+    df_aggregates = query_price_cube(price_cube, {"flat_model": None})
+
+    assert df_aggregates["count"].tolist() == [rows]
+    np.testing.assert_allclose(
+        df_aggregates["mean_price"], [df_resale_prices["resale_price"].mean()]
+    )
@@ -0,0 +1,44 @@
+import math
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+
+def sample_rows(
+    df: pd.DataFrame,
+    fraction: Optional[float],
+    max_rows: Optional[int],
+    seed: int,
+    stratify_by: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    # Picks the same rows for the same data and seed. With stratification every group,
+    # e.g. every town and month, keeps its share of the rows, and at least one row.
+    # The rows keep their original order.
+    size = _sample_size(len(df), fraction, max_rows)
+    if size >= len(df):
+        return df.reset_index(drop=True)
+
+    keys = pd.Series(np.random.default_rng(seed).random(len(df)), index=df.index)
+
+    if stratify_by:
+        groups = [df[column] for column in stratify_by]
+        rank = keys.groupby(groups, dropna=False, observed=True).rank(method="first")
+        group_size = keys.groupby(groups, dropna=False, observed=True).transform("size")
+        quota = np.maximum(1, np.round(group_size * size / len(df)))
+        selected = keys[rank <= quota]
+
+        # The minimum of one row per group can exceed a row cap
+        if max_rows is not None and len(selected) > max_rows:
+            selected = selected.nsmallest(max_rows)
+    else:
+        selected = keys.nsmallest(size)
+
+    return df.loc[selected.index.sort_values()].reset_index(drop=True)
+
+
+def _sample_size(rows: int, fraction: Optional[float], max_rows: Optional[int]) -> int:
+    size = rows if fraction is None else math.floor(rows * fraction + 0.5)
+    if max_rows is not None:
+        size = min(size, max_rows)
+
+    return size
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from .sampling import sample_rows
+
+df = pd.DataFrame(
+    {
+        "town": np.repeat(["BEDOK", "BISHAN", "YISHUN"], [600, 300, 100]),
+        "month": np.tile(["2017-01", "2017-02"], 500),
+        "price": np.arange(1000),
+    }
+)
+
+
+def test_sample_rows_is_deterministic():
+    first = sample_rows(df, fraction=0.1, max_rows=None, seed=1)
+    second = sample_rows(df, fraction=0.1, max_rows=None, seed=1)
+    other = sample_rows(df, fraction=0.1, max_rows=None, seed=2)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert len(first) == 100
+    assert first["price"].is_monotonic_increasing
+    assert not first.equals(other)
+
+
+def test_sample_rows_keeps_share_of_each_stratum():
+    sample = sample_rows(
+        df, fraction=0.1, max_rows=None, seed=1, stratify_by=["town", "month"]
+    )
+
+    counts = sample.groupby(["town", "month"]).size()
+    assert counts.to_dict() == {
+        ("BEDOK", "2017-01"): 30,
+        ("BEDOK", "2017-02"): 30,
+        ("BISHAN", "2017-01"): 15,
+        ("BISHAN", "2017-02"): 15,
+        ("YISHUN", "2017-01"): 5,
+        ("YISHUN", "2017-02"): 5,
+    }
+
+
+def test_sample_rows_caps_rows():
+    sample = sample_rows(
+        df, fraction=None, max_rows=4, seed=1, stratify_by=["town", "month"]
+    )
+
+    assert len(sample) == 4
@@ -2,4 +2,8 @@ import pandas as pd
 
 
 def select_columns(df: pd.DataFrame, selector: dict[str, str]) -> pd.DataFrame:
-    return df.rename(columns=selector)[[*selector.values()]]
+    # Select first, so only the kept columns are copied, then rename in place
+    selected = df[[*selector.keys()]]
+    selected.columns = [*selector.values()]
+
+    return selected